@@ -4,7 +4,15 @@ from .node import Node, Variable
 #                    add, sub, mul, div, pow, matmul) 
 # from .node import lt, le, eq, ne, ge, gt, all, any
 from .vector import Vector
-from .grad import grad
+from .matrix import Matrix
+from .backend import available_backends, get_backend, set_backend
+from .grad import grad, hvp
+from .checkpoint import checkpoint
+from .forward import jvp, jacobian
+from .compiler import compile
+from .batching import vmap
+from .grad_mode import no_grad, is_grad_enabled, set_grad_enabled
+from . import data, optim, parallel
 
 
 abs = Node.abs
@@ -23,12 +31,18 @@ tanh = Node.tanh
 sigmoid = Node.sigmoid
 relu = Node.relu
 sum = Node.sum
+mean = Node.mean
+max = Node.max
+logsumexp = Node.logsumexp
+binary_cross_entropy_with_logits = Node.binary_cross_entropy_with_logits
+softmax_cross_entropy = Node.softmax_cross_entropy
 add = Node.add
 sub = Node.sub
 mul = Node.mul
 div = Node.div
 pow = Node.pow
 matmul = Node.matmul
+transpose = Node.transpose
 # lt = Node.lt
 # le = Node.le
 # eq = Node.eq
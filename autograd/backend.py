@@ -0,0 +1,472 @@
+from array import array
+import builtins
+import math
+import numbers
+import operator
+
+
+def _doubles(buffer, offset, count):
+    # zero-copy memoryview of the doubles stored in a bytes-like object
+    doubles = memoryview(buffer).cast('B')[offset:].cast('d')
+    return doubles if count < 0 else doubles[:count]
+
+
+class ListBackend:
+    # stores the elements as boxed Python numbers (the original storage of `Vector`)
+    name = 'list'
+    # whether vectors over buffers (see `Vector.frombuffer`) share the memory of the buffer
+    shares_buffers = False
+
+    def asarray(self, data):
+        return list(data)
+
+    def isnative(self, data):
+        return isinstance(data, list)
+
+    def isdouble(self, data):
+        # whether the elements are doubles, i.e. can be passed as raw bytes (see `memoryview`)
+        return all(type(v) is float for v in data)
+
+    def full(self, dim, val):
+        return [val] * dim
+
+    def copy(self, data):
+        return list(data)
+
+    def tolist(self, data):
+        return list(data)
+
+    def scalar(self, data, idx):
+        return data[idx]
+
+    def delete(self, data, idx):
+        del data[idx]
+        return data
+
+    # views and buffers: lists can't share their storage, 
+    # so their views and buffers are copies
+
+    def view(self, data, idx):
+        return data[idx]
+
+    def frombuffer(self, buffer, offset=0, count=-1):
+        return list(_doubles(buffer, offset, count))
+
+    def memoryview(self, data):
+        return memoryview(array('d', data))
+
+    def scatter_add(self, data, idx, values):
+        # adds the values to the elements selected by an integer or a slice
+        if isinstance(idx, int):
+            data[idx] += values[0]
+        else:
+            for i, v in zip(range(*idx.indices(len(data))), values):
+                data[i] += v
+        return data
+
+    def unary(self, data, op):
+        return [op(v) for v in data]
+
+    def binary(self, data_one, data_two, op):
+        return [op(u, v) for u, v in zip(data_one, data_two)]
+
+    def binary_scalar(self, data, scalar, op):
+        return [op(v, scalar) for v in data]
+
+    def scalar_binary(self, scalar, data, op):
+        return [op(scalar, v) for v in data]
+
+    # in-place ops write their result into `data` with a slice assignment,
+    # which keeps the views and the buffers of the data valid
+
+    def inplace_binary(self, data, other, op):
+        if isinstance(other, numbers.Number):
+            data[:] = self.binary_scalar(data, other, op)
+        else:
+            data[:] = self.binary(data, other, op)
+        return data
+
+    def axpy(self, data, alpha, other):
+        # data += alpha * other in a single pass
+        data[:] = self.binary(data, other, lambda v, u: v + alpha * u)
+        return data
+
+    def addcmul(self, data, value, data_one, data_two):
+        # data += value * data_one * data_two in a single pass
+        data[:] = self.asarray(map(lambda v, u, w: v + value * u * w, data, data_one, data_two))
+        return data
+
+    def addcdiv(self, data, value, data_one, data_two):
+        # data += value * data_one / data_two in a single pass
+        data[:] = self.asarray(map(lambda v, u, w: v + value * u / w, data, data_one, data_two))
+        return data
+
+    def ifill(self, data, val):
+        data[:] = self.full(len(data), val)
+        return data
+
+    def setslice(self, data, idx, values):
+        data[idx] = self.asarray(values)
+
+    def sum(self, data):
+        return builtins.sum(data)
+
+    def max(self, data):
+        return builtins.max(data)
+
+    def dot(self, data_one, data_two):
+        return builtins.sum(map(operator.mul, data_one, data_two))
+
+    # helpers of batched evaluation, where a batch of vectors 
+    # is stored as consecutive segments of a single flat vector
+
+    def tile(self, data, reps):
+        return list(data) * reps
+
+    def repeat(self, data, reps):
+        return [v for v in data for _ in range(reps)]
+
+    def segment_sum(self, data, size):
+        return [builtins.sum(data[i:i + size]) for i in range(0, len(data), size)]
+
+    def segment_max(self, data, size):
+        return [builtins.max(data[i:i + size]) for i in range(0, len(data), size)]
+
+    def fold_sum(self, data, size):
+        return [builtins.sum(data[i::size]) for i in range(size)]
+
+    # helpers of `Matrix`, which stores its elements row by row in flat data
+
+    def gather(self, data, shape, strides, offset):
+        # copies a strided view (e.g. a transpose) into contiguous row-major data
+        rows, cols = shape
+        row_stride, col_stride = strides
+        result = []
+        for i in range(rows):
+            start = offset + i * row_stride
+            result.extend(data[start:start + (cols - 1) * col_stride + 1:col_stride] 
+                          if cols else [])
+        return result
+
+    def matmul(self, data_one, data_two, m, k, n):
+        # product of row-major (m, k) and (k, n) matrices; every column of the 
+        # second operand is extracted once and every element of the result 
+        # is a single dot product run at C speed by `sum` and `map` over boxed floats
+        data_one, data_two = self.tolist(data_one), self.tolist(data_two)
+        rows = [data_one[i * k:(i + 1) * k] for i in range(m)]
+        cols = [data_two[j::n] for j in range(n)]
+        return [builtins.sum(map(operator.mul, row, col)) for row in rows for col in cols]
+
+    def all(self, data):
+        return builtins.all(data)
+
+    def any(self, data):
+        return builtins.any(data)
+
+
+class ArrayBackend(ListBackend):
+    # stores the elements unboxed in a contiguous `array('d')` (8 bytes per element);
+    # data that isn't all floats (e.g. complex numbers, or integers and fractions, which 
+    # stay exact and can be larger than a double) is kept in a list, like with `ListBackend`
+    name = 'array'
+    typecode = 'd'
+    shares_buffers = True
+
+    def _array(self, make, *inputs):
+        # the result of an op on data kept in a list is an array only if it's all floats
+        if builtins.any(isinstance(data, list) for data in inputs):
+            return self.asarray(make())
+        try:
+            return array(self.typecode, make())
+        except (TypeError, OverflowError):
+            return list(make())
+
+    def asarray(self, data):
+        if isinstance(data, (array, memoryview)):
+            return array(self.typecode, data)
+        data = list(data)
+        if builtins.all(isinstance(v, float) for v in data):
+            return array(self.typecode, data)
+        return data
+
+    def isnative(self, data):
+        return isinstance(data, (array, list, memoryview))
+
+    def isdouble(self, data):
+        return isinstance(data, (array, memoryview)) or super().isdouble(data)
+
+    def full(self, dim, val):
+        return self._array(lambda: [val]) * dim
+
+    def copy(self, data):
+        # slicing a memoryview gives another view
+        return array(self.typecode, data) if isinstance(data, memoryview) else data[:]
+
+    def tolist(self, data):
+        return data.tolist() if isinstance(data, (array, memoryview)) else list(data)
+
+    def setslice(self, data, idx, values):
+        # the values are converted to doubles when they are written into an array
+        if isinstance(data, (array, memoryview)):
+            values = array(self.typecode, values)
+        data[idx] = values
+
+    def delete(self, data, idx):
+        # the array is rebuilt instead of resized in place, which isn't possible
+        # while views of it exist (the views keep the old storage)
+        if isinstance(data, (array, memoryview)):
+            data = array(self.typecode, data)
+        del data[idx]
+        return data
+
+    # views are memoryviews, which share the storage of the array (or the buffer) they 
+    # were taken from; they can be strided and are accepted wherever an array is
+
+    def view(self, data, idx):
+        if isinstance(data, (array, memoryview)):
+            return memoryview(data)[idx]
+        return data[idx]
+
+    def frombuffer(self, buffer, offset=0, count=-1):
+        return _doubles(buffer, offset, count)
+
+    def memoryview(self, data):
+        if isinstance(data, (array, memoryview)):
+            return memoryview(data)
+        return memoryview(array(self.typecode, data))
+
+    def unary(self, data, op):
+        return self._array(lambda: map(op, data), data)
+
+    def binary(self, data_one, data_two, op):
+        return self._array(lambda: map(op, data_one, data_two), data_one, data_two)
+
+    def binary_scalar(self, data, scalar, op):
+        return self._array(lambda: [op(v, scalar) for v in data], data)
+
+    def scalar_binary(self, scalar, data, op):
+        return self._array(lambda: [op(scalar, v) for v in data], data)
+
+    def tile(self, data, reps):
+        return self.asarray(data) * reps
+
+    def repeat(self, data, reps):
+        return self._array(lambda: super(ArrayBackend, self).repeat(data, reps), data)
+
+    def segment_sum(self, data, size):
+        return self._array(lambda: super(ArrayBackend, self).segment_sum(data, size), data)
+
+    def segment_max(self, data, size):
+        return self._array(lambda: super(ArrayBackend, self).segment_max(data, size), data)
+
+    def fold_sum(self, data, size):
+        return self._array(lambda: super(ArrayBackend, self).fold_sum(data, size), data)
+
+    def gather(self, data, shape, strides, offset):
+        return self._array(lambda: super(ArrayBackend, self).gather(data, shape, strides, offset),
+                           data)
+
+    def matmul(self, data_one, data_two, m, k, n):
+        return self._array(lambda: super(ArrayBackend, self).matmul(data_one, data_two, m, k, n),
+                           data_one, data_two)
+
+
+class NumpyBackend:
+    # stores the elements in a NumPy array and dispatches elementwise ops to ufuncs
+    name = 'numpy'
+    shares_buffers = True
+
+    def __init__(self):
+        import numpy as np
+        self.np = np
+        self.ufuncs = {
+            math.log: np.log, math.log2: np.log2, math.log10: np.log10,
+            math.log1p: np.log1p, math.exp: np.exp, operator.abs: np.abs,
+            math.sin: np.sin, math.cos: np.cos, math.tan: np.tan,
+            math.sinh: np.sinh, math.cosh: np.cosh, math.tanh: np.tanh,
+            operator.add: np.add, operator.sub: np.subtract, operator.mul: np.multiply,
+            operator.truediv: np.true_divide, operator.pow: np.power,
+            operator.lt: np.less, operator.le: np.less_equal, operator.eq: np.equal,
+            operator.ne: np.not_equal, operator.ge: np.greater_equal, operator.gt: np.greater,
+        }
+
+    def asarray(self, data):
+        data = self.np.asarray(data)
+        if data.dtype.kind not in 'fc':
+            data = data.astype(float)
+        return data
+
+    def isnative(self, data):
+        return isinstance(data, self.np.ndarray)
+
+    def isdouble(self, data):
+        return data.dtype == float
+
+    def full(self, dim, val):
+        return self.np.full(dim, val, dtype=complex if isinstance(val, complex) else float)
+
+    def copy(self, data):
+        return data.copy()
+
+    def tolist(self, data):
+        return self.np.asarray(data).tolist()
+
+    def scalar(self, data, idx):
+        return data[idx].item()
+
+    def delete(self, data, idx):
+        return self.np.delete(data, idx)
+
+    # basic slicing of NumPy arrays gives views
+
+    def view(self, data, idx):
+        return self.asarray(data)[idx]
+
+    def frombuffer(self, buffer, offset=0, count=-1):
+        return self.np.frombuffer(buffer, dtype=float, count=count, offset=offset)
+
+    def memoryview(self, data):
+        return memoryview(self.asarray(data))
+
+    def setslice(self, data, idx, values):
+        data[idx] = self.asarray(values)
+
+    def scatter_add(self, data, idx, values):
+        values = self.asarray(values)
+        data[idx] += values[0] if isinstance(idx, int) else values
+        return data
+
+    # ops without a ufunc counterpart are applied element by element
+
+    def unary(self, data, op):
+        ufunc = self.ufuncs.get(op)
+        if ufunc is None:
+            return self.asarray([op(v) for v in self.tolist(data)])
+        return ufunc(data)
+
+    def binary(self, data_one, data_two, op):
+        ufunc = self.ufuncs.get(op)
+        if ufunc is None:
+            return self.asarray([op(u, v) for u, v in zip(self.tolist(data_one), 
+                                                          self.tolist(data_two))])
+        return self.asarray(ufunc(data_one, data_two))
+
+    def binary_scalar(self, data, scalar, op):
+        ufunc = self.ufuncs.get(op)
+        if ufunc is None:
+            return self.asarray([op(v, scalar) for v in self.tolist(data)])
+        return self.asarray(ufunc(data, scalar))
+
+    def scalar_binary(self, scalar, data, op):
+        ufunc = self.ufuncs.get(op)
+        if ufunc is None:
+            return self.asarray([op(scalar, v) for v in self.tolist(data)])
+        return self.asarray(ufunc(scalar, data))
+
+    def inplace_binary(self, data, other, op):
+        data = self.asarray(data)
+        ufunc = self.ufuncs.get(op)
+        if ufunc is None:
+            data[:] = (self.binary_scalar(data, other, op) if isinstance(other, numbers.Number)
+                       else self.binary(data, other, op))
+        else:
+            ufunc(data, other, out=data)
+        return data
+
+    def axpy(self, data, alpha, other):
+        data = self.asarray(data)
+        data += alpha * self.asarray(other)
+        return data
+
+    def addcmul(self, data, value, data_one, data_two):
+        data = self.asarray(data)
+        data += value * self.asarray(data_one) * self.asarray(data_two)
+        return data
+
+    def addcdiv(self, data, value, data_one, data_two):
+        data = self.asarray(data)
+        data += value * self.asarray(data_one) / self.asarray(data_two)
+        return data
+
+    def ifill(self, data, val):
+        data = self.asarray(data)
+        data.fill(val)
+        return data
+
+    def sum(self, data):
+        return self.np.sum(data).item()
+
+    def max(self, data):
+        return self.np.max(data).item()
+
+    def dot(self, data_one, data_two):
+        return self.np.dot(data_one, data_two).item()
+
+    def tile(self, data, reps):
+        return self.np.tile(data, reps)
+
+    def repeat(self, data, reps):
+        return self.np.repeat(data, reps)
+
+    def segment_sum(self, data, size):
+        return data.reshape(-1, size).sum(axis=1)
+
+    def segment_max(self, data, size):
+        return data.reshape(-1, size).max(axis=1)
+
+    def fold_sum(self, data, size):
+        return data.reshape(-1, size).sum(axis=0)
+
+    def gather(self, data, shape, strides, offset):
+        data = self.asarray(data)
+        view = self.np.lib.stride_tricks.as_strided(
+            data[offset:], shape, tuple(stride * data.itemsize for stride in strides))
+        return self.np.ascontiguousarray(view).ravel()
+
+    def matmul(self, data_one, data_two, m, k, n):
+        one = self.asarray(data_one).reshape(m, k)
+        two = self.asarray(data_two).reshape(k, n)
+        return (one @ two).ravel()
+
+    def all(self, data):
+        return bool(self.np.all(data))
+
+    def any(self, data):
+        return bool(self.np.any(data))
+
+
+_backends = {
+    'list': ListBackend,
+    'array': ArrayBackend,
+    'numpy': NumpyBackend,
+}
+
+# the list storage is the default: the ops of `ArrayBackend` convert every element to 
+# and from a double, so it saves memory (8 instead of 32 bytes per element) at the cost 
+# of being slower (see benchmarks/bench_vector.py); `NumpyBackend` is the fast one
+current = ListBackend()
+
+
+def available_backends():
+    names = []
+    for name, backend_cls in _backends.items():
+        try:
+            backend_cls()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_backend():
+    return current.name
+
+
+def set_backend(name):
+    # vectors created before the switch keep their storage and are
+    # converted lazily by the operations of the new backend
+    global current
+    if name not in _backends:
+        raise ValueError(f'unknown backend {name!r}, '
+                         f'expected one of {", ".join(_backends)}')
+    current = _backends[name]()
@@ -0,0 +1,253 @@
+import math
+import numbers
+from .codegen import is_elementwise
+from .compiler import CompiledFunction
+from .node import Node
+from .ops import LogSumExp, Matmul, Max, Mean, SoftmaxCrossEntropy, Sum
+from .vector import Vector
+
+
+def _as_vector(sample):
+    if isinstance(sample, Node):
+        return sample.value
+    elif isinstance(sample, numbers.Number):
+        return Vector([sample])
+    elif isinstance(sample, Vector):
+        return sample
+    return Vector(sample)
+
+
+def _stack(samples):
+    # concatenates the samples of a batched argument into one flat vector
+    samples = [_as_vector(sample) for sample in samples]
+    if len({sample.dim for sample in samples}) != 1:
+        raise ValueError('samples of a batched argument must have the same dimension')
+    data = []
+    for sample in samples:
+        data.extend(sample.tolist())
+    return Vector(data)
+
+
+def _unstack(vector, dim):
+    return [vector[i:i + dim] for i in range(0, vector.dim, dim)]
+
+
+def _expand(value, batched, dim, out_dim, size):
+    # brings an operand of an elementwise op to the flat batched shape of the output;
+    # shared one-element operands are left as they are (vector ops broadcast them)
+    if batched:
+        return value if dim == out_dim else value.repeat(out_dim)
+    return value if dim == 1 else value.tile(size)
+
+
+def _reduce(grad, batched, dim, size):
+    # inverse of `_expand` applied to the gradient
+    if batched:
+        return grad if grad.dim == size * dim else grad.segment_sum(grad.dim // size)
+    if grad.dim == dim:
+        return grad
+    return grad.sum() if dim == 1 else grad.fold_sum(dim)
+
+
+def _logsumexp(x, dim):
+    # `logsumexp` of every sample, each shifted by its own (finite) maximum
+    shifts = Vector([m if math.isfinite(m) else 0 for m in x.segment_max(dim).tolist()])
+    totals = (x - shifts.repeat(dim)).exp().segment_sum(dim)
+    return Vector([math.log(total) + shift if total > 0 else -math.inf
+                   for total, shift in zip(totals.tolist(), shifts.tolist())])
+
+
+class BatchedFunction:
+    # evaluates `fn` over a whole batch of samples at once: the graph of `fn` is
+    # traced for a single sample (see `compile`) and its instructions are run
+    # on flat vectors that hold the samples of the batch one after another,
+    # so the per-op overhead is paid once per batch instead of once per sample
+
+    def __init__(self, fn, in_axes=0):
+        self.compiled = CompiledFunction(fn)
+        self.in_axes = in_axes
+
+    def _axes(self, inputs):
+        in_axes = self.in_axes
+        if in_axes is None or isinstance(in_axes, int):
+            in_axes = [in_axes] * len(inputs)
+        elif len(in_axes) != len(inputs):
+            raise ValueError('in_axes must have an entry for every argument')
+        for axis in in_axes:
+            if axis not in (0, None):
+                raise ValueError('in_axes entries must be 0 (batched) or None (shared)')
+        return list(in_axes)
+
+    def _prepare(self, inputs, per_sample=False):
+        axes = self._axes(inputs)
+        size = None
+        examples, args = [], []
+        for input, axis in zip(inputs, axes):
+            if axis is None:
+                examples.append(input)
+                args.append(input)
+                continue
+            samples = list(input)
+            if not samples:
+                raise ValueError('batched arguments must have at least one sample')
+            if size is None:
+                size = len(samples)
+            elif len(samples) != size:
+                raise ValueError('batched arguments have different numbers of samples')
+            examples.append(_as_vector(samples[0]))
+            args.append(_stack(samples))
+        if size is None:
+            raise ValueError('at least one argument must be batched')
+
+        program = self.compiled.program(*examples)
+        values = program.load(args)
+        batched = [False] * program.num_slots
+        for slot, source in program.leaves:
+            if isinstance(source, int) and axes[source] == 0:
+                batched[slot] = True
+            elif per_sample and program.requires_grad[slot]:
+                # every sample gets its own copy of the parameters
+                values[slot] = values[slot].tile(size)
+                batched[slot] = True
+        return program, values, batched, size
+
+    def _forward(self, program, values, batched, size):
+        dims = program.dims
+        for op, out_slot, in_slots in program.instructions:
+            operands = [values[slot] for slot in in_slots]
+            if not any(batched[slot] for slot in in_slots):
+                values[out_slot] = op.fn(*operands)
+                continue
+
+            batched[out_slot] = True
+            if issubclass(op, Sum):
+                values[out_slot] = operands[0].segment_sum(dims[in_slots[0]])
+            elif issubclass(op, Mean):
+                dim = dims[in_slots[0]]
+                values[out_slot] = operands[0].segment_sum(dim) / dim
+            elif issubclass(op, Max):
+                values[out_slot] = operands[0].segment_max(dims[in_slots[0]])
+            elif issubclass(op, LogSumExp):
+                values[out_slot] = _logsumexp(operands[0], dims[in_slots[0]])
+            elif issubclass(op, SoftmaxCrossEntropy):
+                dim = dims[in_slots[0]]
+                z, y = [_expand(values[slot], batched[slot], dims[slot], dim, size)
+                        for slot in in_slots]
+                values[out_slot] = (y.segment_sum(dim) * _logsumexp(z, dim) 
+                                    - (y * z).segment_sum(dim))
+            elif issubclass(op, Matmul):
+                x, y = [_expand(values[slot], batched[slot], dims[slot],
+                                dims[in_slots[0]], size) for slot in in_slots]
+                values[out_slot] = (x * y).segment_sum(dims[in_slots[0]])
+            elif is_elementwise(op):
+                values[out_slot] = op.fn(*[_expand(values[slot], batched[slot], dims[slot],
+                                                   dims[out_slot], size) for slot in in_slots])
+            else:
+                raise TypeError(f'{op.__name__} ops are not supported by vmap')
+
+        if not batched[program.output_slot]:
+            raise ValueError('output of the function does not depend on the batched arguments')
+        return values
+
+    def _backward(self, program, values, batched, size):
+        dims, requires_grad = program.dims, program.requires_grad
+        grads = [None] * program.num_slots
+        grads[program.output_slot] = Vector.ones(size * dims[program.output_slot])
+
+        for op, out_slot, in_slots in reversed(program.instructions):
+            prev_grad = grads[out_slot]
+            if prev_grad is None:
+                continue
+            grads[out_slot] = None
+            needs_grad = [requires_grad[slot] for slot in in_slots]
+
+            if not batched[out_slot]:
+                parent_grads = op.backward(prev_grad, values[out_slot],
+                                           *[values[slot] for slot in in_slots], needs_grad)
+            elif issubclass(op, Sum):
+                parent_grads = (prev_grad.repeat(dims[in_slots[0]]),)
+            elif issubclass(op, Mean):
+                dim = dims[in_slots[0]]
+                parent_grads = (prev_grad.repeat(dim) / dim,)
+            elif issubclass(op, Max):
+                # split evenly between the elements equal to the maximum (see `Max`)
+                dim = dims[in_slots[0]]
+                mask = values[in_slots[0]] == values[out_slot].repeat(dim)
+                parent_grads = ((prev_grad / mask.segment_sum(dim)).repeat(dim) * mask,)
+            elif issubclass(op, LogSumExp):
+                dim = dims[in_slots[0]]
+                softmax = (values[in_slots[0]] - values[out_slot].repeat(dim)).exp()
+                parent_grads = (prev_grad.repeat(dim) * softmax,)
+            elif issubclass(op, SoftmaxCrossEntropy):
+                dim = dims[in_slots[0]]
+                z, y = [_expand(values[slot], batched[slot], dims[slot], dim, size)
+                        for slot in in_slots]
+                lse = _logsumexp(z, dim).repeat(dim)
+                prev_grad = prev_grad.repeat(dim)
+                parent_grads = (
+                    prev_grad * ((z - lse).exp() * y.segment_sum(dim).repeat(dim) - y)
+                    if needs_grad[0] else None,
+                    prev_grad * (lse - z) if needs_grad[1] else None)
+            elif issubclass(op, Matmul):
+                dim = dims[in_slots[0]]
+                x, y = [_expand(values[slot], batched[slot], dims[slot], dim, size)
+                        for slot in in_slots]
+                prev_grad = prev_grad.repeat(dim)
+                parent_grads = (prev_grad * y if needs_grad[0] else None,
+                                prev_grad * x if needs_grad[1] else None)
+            else:
+                operands = [_expand(values[slot], batched[slot], dims[slot],
+                                    dims[out_slot], size) for slot in in_slots]
+                parent_grads = op.backward(prev_grad, values[out_slot], *operands, needs_grad)
+
+            for slot, parent_grad in zip(in_slots, parent_grads):
+                if parent_grad is None:
+                    continue
+                if batched[out_slot]:
+                    parent_grad = _reduce(parent_grad, batched[slot], dims[slot], size)
+                grads[slot] = parent_grad if grads[slot] is None else grads[slot] + parent_grad
+
+        return grads
+
+    def forward(self, *inputs):
+        # the outputs of all the samples, concatenated into one vector
+        program, values, batched, size = self._prepare(inputs)
+        return self._forward(program, values, batched, size)[program.output_slot]
+
+    def __call__(self, *inputs):
+        # runs the forward and the backward pass, sets the gradients of the variables
+        # that require grad (summed over the batch) and returns the outputs of the samples
+        program, values, batched, size = self._prepare(inputs)
+        self._forward(program, values, batched, size)
+        grads = self._backward(program, values, batched, size)
+
+        # leaves don't share their gradients (see `CompiledFunction.__call__`)
+        assigned = set()
+        for slot, source in program.leaves:
+            if grads[slot] is None or not program.requires_grad[slot]:
+                continue
+            leaf = inputs[source] if isinstance(source, int) else source
+            leaf.grad = grads[slot].copy() if id(grads[slot]) in assigned else grads[slot]
+            assigned.add(id(grads[slot]))
+
+        return values[program.output_slot]
+
+    def per_sample_grads(self, *inputs):
+        # returns the outputs of the samples and, for every argument that requires
+        # grad, the list of its gradients per sample (`None` for the other arguments)
+        program, values, batched, size = self._prepare(inputs, per_sample=True)
+        self._forward(program, values, batched, size)
+        grads = self._backward(program, values, batched, size)
+
+        input_grads = [None] * len(inputs)
+        for slot, source in program.leaves:
+            if isinstance(source, int) and grads[slot] is not None:
+                input_grads[source] = _unstack(grads[slot], program.dims[slot])
+
+        return values[program.output_slot], input_grads
+
+
+def vmap(fn, in_axes=0):
+    # `in_axes` tells for every argument of `fn` whether it's batched (0),
+    # i.e. a sequence of samples, or shared by all the samples (None)
+    return BatchedFunction(fn, in_axes)
@@ -0,0 +1,105 @@
+from . import grad_mode
+from .grad import grad, grad_sort
+from .node import Dual, Node, Variable
+
+
+class Checkpoint(Node):
+    # stores only the inputs of the checkpointed segment during the forward pass
+    # and rebuilds the segment's subgraph from them during the backward pass
+
+    def __init__(self, fn, inputs):
+        super().__init__(inputs)
+        self.fn = fn
+        self._value = self.evaluate()
+
+    @property
+    def value(self):
+        if self._value is None:
+            raise RuntimeError('value of the node was released by the backward pass, '
+                               'use grad(..., retain_graph=True) to keep it')
+        return self._value
+
+    def evaluate(self):
+        prev = grad_mode.is_grad_enabled()
+        grad_mode.set_grad_enabled(False)
+        try:
+            value = self.fn(*self.parents)
+        finally:
+            grad_mode.set_grad_enabled(prev)
+        return value.value if isinstance(value, Node) else value
+
+    def vjp(self, prev_grad, needs_grad=None):
+        # the subgraph is rebuilt once per backward pass for all of the parents
+        if needs_grad is None:
+            needs_grad = [parent.requires_grad for parent in self.parents]
+        if isinstance(prev_grad, Node):
+            return self._vjp_graph(prev_grad, needs_grad)
+        inputs = [Variable(parent.value, bool(need) and parent.requires_grad) 
+                  for parent, need in zip(self.parents, needs_grad)]
+
+        prev = grad_mode.is_grad_enabled()
+        grad_mode.set_grad_enabled(True)
+        try:
+            top_node = self.fn(*inputs)
+        finally:
+            grad_mode.set_grad_enabled(prev)
+        # the output may not depend on the inputs (or on none that requires grad)
+        if not isinstance(top_node, Node) or not top_node.requires_grad:
+            return [None] * len(inputs)
+
+        input_ids = {id(input) for input in inputs}
+        for node in grad_sort(top_node, requires_grad_only=True):
+            if node.is_leaf and id(node) not in input_ids:
+                raise ValueError('checkpointed function uses a variable that requires grad '
+                                 'and is not one of its inputs')
+
+        trainable = [input for input in inputs if input.requires_grad]
+        if not trainable:
+            return [None] * len(inputs)
+        grads = iter(grad(top_node, wrt=trainable, retain_graph=False, top_grad=prev_grad))
+        return [next(grads) if input.requires_grad else None for input in inputs]
+
+    def _vjp_graph(self, prev_grad, needs_grad):
+        # with `create_graph` the subgraph is rebuilt on the parents themselves (instead of
+        # on copies of their values), so the gradients are nodes that depend on the parents
+        # and can be differentiated again; the backward pass stops at the parents
+        prev = grad_mode.is_grad_enabled()
+        grad_mode.set_grad_enabled(True)
+        try:
+            top_node = self.fn(*self.parents)
+        finally:
+            grad_mode.set_grad_enabled(prev)
+        if not isinstance(top_node, Node) or not top_node.requires_grad:
+            return [None] * len(self.parents)
+
+        parent_ids = {id(parent) for parent in self.parents}
+        nodes = list(grad_sort(top_node, requires_grad_only=True, stop=self.parents))
+        for node in nodes:
+            if node.is_leaf and id(node) not in parent_ids:
+                raise ValueError('checkpointed function uses a variable that requires grad '
+                                 'and is not one of its inputs')
+
+        dct = {id(top_node): prev_grad}
+        for node in nodes:
+            if id(node) in parent_ids or id(node) not in dct:
+                continue
+            node_grad = dct.pop(id(node))
+            needs = [parent.requires_grad for parent in node.parents]
+            for parent, parent_grad in zip(node.parents, node.vjp(node_grad, needs)):
+                if parent_grad is None:
+                    continue
+                dct[id(parent)] = (parent_grad if id(parent) not in dct
+                                   else dct[id(parent)] + parent_grad)
+
+        # a parent passed more than once gets the whole gradient the first time
+        grads = []
+        for parent, need in zip(self.parents, needs_grad):
+            grads.append(dct.pop(id(parent), None) if need else None)
+        return grads
+
+
+def checkpoint(fn, *inputs):
+    # `fn` has to receive every variable that requires grad through `inputs`
+    if not grad_mode.is_grad_enabled() or any(isinstance(input, Dual) for input in inputs):
+        return fn(*inputs)
+    return Checkpoint(fn, inputs)
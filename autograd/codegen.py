@@ -0,0 +1,322 @@
+import math
+import re
+from . import backend
+from .ops import EPSILON, Sum, Matmul
+from .vector import Vector
+
+
+# generated functions are shared by all programs with the same graph signature
+_cache = {}
+
+
+def to_vector(data):
+    return Vector._from_data(backend.current.asarray(data))
+
+def call_fn(op, *parent_data):
+    # ops without source templates are called on vectors
+    return op.fn(*map(to_vector, parent_data)).tolist()
+
+def call_backward(op, prev_grad, value, *parent_data):
+    grads = op.backward(*map(to_vector, (prev_grad, value) + parent_data))
+    return [grad.tolist() for grad in grads]
+
+
+def _comprehension(expr, loops):
+    # `loops` are (loop variable, iterable) pairs iterated in lockstep,
+    # the ones not used by the expression are dropped (except for the first one)
+    loops = list(dict.fromkeys(loops))
+    loops = loops[:1] + [loop for loop in loops[1:] 
+                         if re.search(rf'\b{loop[0]}\b', expr)]
+    if len(loops) == 1:
+        var, iterable = loops[0]
+        return f'[{expr} for {var} in {iterable}]'
+    return (f'[{expr} for {", ".join(var for var, _ in loops)} '
+            f'in zip({", ".join(iterable for _, iterable in loops)})]')
+
+
+class _Generator:
+
+    def __init__(self, program, backward, fuse):
+        self.program = program
+        self.dims = program.dims
+        self.backward = backward
+        # fused groups of elementwise instructions, keyed by the slot of their output
+        self.groups = fusion_groups(program) if fuse else {}
+        self.fused = {slot for group in self.groups.values() 
+                      for _, slot, _ in group}
+        self.lines = []
+        self.namespace = {'math': math, 'EPSILON': EPSILON,
+                          'call_fn': call_fn, 'call_backward': call_backward}
+
+    def emit(self, line):
+        self.lines.append('    ' + line)
+
+    def ref(self, slot, dim):
+        # an element of the slot inside a loop of length `dim` (broadcast if needed)
+        if self.dims[slot] == dim:
+            return f'x{slot}', (f'x{slot}', f'v{slot}')
+        return f's{slot}', None
+
+    def refs(self, slots, dim):
+        names, loops = [], []
+        for slot in slots:
+            name, loop = self.ref(slot, dim)
+            names.append(name)
+            if loop is not None:
+                loops.append(loop)
+        return names, loops
+
+    def define_value(self, slot, expr):
+        self.emit(f'v{slot} = {expr}')
+        if self.dims[slot] == 1:
+            self.emit(f's{slot} = v{slot}[0]')
+
+    def forward_instruction(self, idx, op, out_slot, in_slots):
+        dim = self.dims[out_slot]
+        if op is Sum:
+            self.define_value(out_slot, f'[sum(v{in_slots[0]})]')
+        elif op is Matmul:
+            names, loops = self.refs(in_slots, self.dims[in_slots[0]])
+            self.define_value(out_slot,
+                              f'[sum({_comprehension(" * ".join(names), loops)})]')
+        elif op.fn_src is not None:
+            names, loops = self.refs(in_slots, dim)
+            self.define_value(out_slot, _comprehension(op.fn_src.format(*names), loops))
+        else:
+            self.namespace[f'op{idx}'] = op
+            args = ', '.join(f'v{slot}' for slot in in_slots)
+            self.define_value(out_slot, f'call_fn(op{idx}, {args})')
+
+    def accumulate(self, slot, expr, dim, reduce):
+        # adds the contribution `expr` (an elementwise expression over the loops
+        # of a length `dim` computation) to the gradient of the slot
+        expr, loops = expr
+        if reduce:
+            contribution = f'sum({_comprehension(expr, loops)})'
+            if slot in self.defined:
+                self.emit(f'g{slot} = [g{slot}[0] + {contribution}]')
+            else:
+                self.emit(f'g{slot} = [{contribution}]')
+        elif slot in self.defined:
+            self.emit(f'g{slot} = {_comprehension(f"p + {expr}", [("p", f"g{slot}")] + loops)}')
+        else:
+            self.emit(f'g{slot} = {_comprehension(expr, loops)}')
+        self.defined.add(slot)
+
+    def backward_instruction(self, idx, op, out_slot, in_slots):
+        requires_grad = self.program.requires_grad
+        dim = self.dims[out_slot]
+
+        if op is Sum:
+            slot = in_slots[0]
+            if requires_grad[slot]:
+                self.emit(f'gs{out_slot} = g{out_slot}[0]')
+                if slot in self.defined:
+                    self.emit(f'g{slot} = [p + gs{out_slot} for p in g{slot}]')
+                else:
+                    self.emit(f'g{slot} = [gs{out_slot}] * {self.dims[slot]}')
+                    self.defined.add(slot)
+        elif op is Matmul:
+            self.emit(f'gs{out_slot} = g{out_slot}[0]')
+            for k, slot in enumerate(in_slots):
+                if not requires_grad[slot]:
+                    continue
+                other = in_slots[1 - k]
+                self.accumulate(slot, (f'gs{out_slot} * x{other}', [(f'x{other}', f'v{other}')]),
+                                self.dims[slot], reduce=False)
+        elif op.fn_src is not None:
+            names, loops = self.refs(in_slots, dim)
+            loops = [('go', f'g{out_slot}')] + loops + [(f'x{out_slot}', f'v{out_slot}')]
+            grad_srcs = ([op.fn_grad_src] if len(in_slots) == 1
+                         else [op.fn_grad_one_src, op.fn_grad_two_src])
+            for slot, grad_src in zip(in_slots, grad_srcs):
+                if not requires_grad[slot]:
+                    continue
+                expr = f'go * ({grad_src.format(*names, out=f"x{out_slot}")})'
+                self.accumulate(slot, (expr, loops), dim,
+                                reduce=self.dims[slot] != dim)
+        else:
+            self.namespace[f'op{idx}'] = op
+            args = ', '.join(f'v{slot}' for slot in in_slots)
+            self.emit(f't = call_backward(op{idx}, g{out_slot}, v{out_slot}, {args})')
+            for k, slot in enumerate(in_slots):
+                if not requires_grad[slot]:
+                    continue
+                self.accumulate(slot, (f't{k}', [(f't{k}', f't[{k}]')]),
+                                self.dims[slot], reduce=False)
+
+    def group_refs(self, group, dim):
+        # element names of the group members (temporaries) and of its external inputs
+        members = {out_slot for _, out_slot, _ in group}
+        names, loops = {}, []
+        for _, out_slot, in_slots in group:
+            names[out_slot] = f't{out_slot}'
+            for slot in in_slots:
+                if slot not in members:
+                    names[slot], loop = self.ref(slot, dim)
+                    if loop is not None:
+                        loops.append(loop)
+        return names, loops
+
+    def forward_group(self, group):
+        # the whole group is computed as one nested expression in a single pass
+        root = group[-1][1]
+        names, loops = self.group_refs(group, self.dims[root])
+        exprs = {}
+        for op, out_slot, in_slots in group:
+            exprs[out_slot] = op.fn_src.format(*[f'({exprs[slot]})' if slot in exprs 
+                                                 else names[slot] for slot in in_slots])
+        self.define_value(root, _comprehension(exprs[root], loops))
+
+    def backward_group(self, group):
+        # a single pass over the elements recomputes the temporaries of the group
+        # and accumulates the gradients of its external inputs
+        requires_grad = self.program.requires_grad
+        root = group[-1][1]
+        dim = self.dims[root]
+        names, loops = self.group_refs(group, dim)
+        members = {out_slot for _, out_slot, _ in group}
+        # the output of the group is loaded instead of recomputed
+        loops.append((f't{root}', f'v{root}'))
+        external = [slot for slot in dict.fromkeys(slot for _, _, in_slots in group 
+                                                   for slot in in_slots)
+                    if slot not in members and requires_grad[slot]]
+
+        for slot in external:
+            if self.dims[slot] != dim:
+                self.emit(f'r{slot} = 0')
+            elif slot not in self.defined:
+                self.emit(f'g{slot} = [0] * {dim}')
+                self.defined.add(slot)
+
+        temporaries = [(f't{out_slot}', 
+                        f't{out_slot} = {op.fn_src.format(*[names[slot] for slot in in_slots])}')
+                       for op, out_slot, in_slots in group[:-1]]
+        body = [f'd{root} = g{root}[i]']
+
+        for op, out_slot, in_slots in reversed(group):
+            if not requires_grad[out_slot]:
+                continue
+            grad_srcs = ([op.fn_grad_src] if len(in_slots) == 1
+                         else [op.fn_grad_one_src, op.fn_grad_two_src])
+            for slot, grad_src in zip(in_slots, grad_srcs):
+                if not requires_grad[slot]:
+                    continue
+                grad_expr = grad_src.format(*[names[slot] for slot in in_slots], 
+                                            out=names[out_slot])
+                contribution = f'd{out_slot} * ({grad_expr})'
+                if slot in members:
+                    body.append(f'd{slot} = {contribution}')
+                elif self.dims[slot] != dim:
+                    body.append(f'r{slot} += {contribution}')
+                else:
+                    body.append(f'g{slot}[i] += {contribution}')
+
+        # only the temporaries used by the gradients are recomputed
+        used = ' '.join(body)
+        needed = []
+        for name, line in reversed(temporaries):
+            if re.search(rf'\b{name}\b', used):
+                needed.insert(0, line)
+                used += ' ' + line
+
+        self.emit(f'for i in range({dim}):')
+        for var, iterable in dict.fromkeys(loops):
+            if re.search(rf'\b{var}\b', used):
+                self.emit(f'    {var} = {iterable}[i]')
+        for line in needed + body:
+            self.emit(f'    {line}')
+
+        for slot in external:
+            if self.dims[slot] != dim:
+                if slot in self.defined:
+                    self.emit(f'g{slot} = [g{slot}[0] + r{slot}]')
+                else:
+                    self.emit(f'g{slot} = [r{slot}]')
+                    self.defined.add(slot)
+
+    def generate(self):
+        program = self.program
+        leaf_slots = [slot for slot, _ in program.leaves]
+        self.lines.append(f'def program({", ".join(f"v{slot}" for slot in leaf_slots)}):')
+
+        for slot in leaf_slots:
+            if self.dims[slot] == 1:
+                self.emit(f's{slot} = v{slot}[0]')
+        for idx, (op, out_slot, in_slots) in enumerate(program.instructions):
+            if out_slot in self.groups:
+                self.forward_group(self.groups[out_slot])
+            elif out_slot not in self.fused:
+                self.forward_instruction(idx, op, out_slot, in_slots)
+
+        output = f'v{program.output_slot}'
+        if not self.backward:
+            self.emit(f'return {output}')
+            return '\n'.join(self.lines) + '\n'
+
+        self.defined = {program.output_slot}
+        self.emit(f'g{program.output_slot} = [1.0] * {self.dims[program.output_slot]}')
+        for idx, (op, out_slot, in_slots) in reversed(list(enumerate(program.instructions))):
+            if out_slot not in self.defined:
+                continue
+            if out_slot in self.groups:
+                self.backward_group(self.groups[out_slot])
+            else:
+                self.backward_instruction(idx, op, out_slot, in_slots)
+
+        grads = ', '.join(f'g{slot}' if slot in self.defined else 'None'
+                          for slot in leaf_slots)
+        self.emit(f'return {output}, ({grads}{"," if len(leaf_slots) == 1 else ""})')
+        return '\n'.join(self.lines) + '\n'
+
+
+def is_elementwise(op):
+    return op is not Sum and op is not Matmul and op.fn_src is not None
+
+
+def fusion_groups(program):
+    # merges chains of elementwise instructions: an instruction is fused into 
+    # its consumer if it's the only use of its output and both have the same dimension;
+    # returns the groups (in topological order) with at least two members
+    dims = program.dims
+    uses = [0] * program.num_slots
+    consumer = {}
+    for op, out_slot, in_slots in program.instructions:
+        for slot in in_slots:
+            uses[slot] += 1
+            consumer[slot] = (op, out_slot)
+
+    root_of = {}
+    for op, out_slot, in_slots in reversed(program.instructions):
+        root_of[out_slot] = out_slot
+        if (is_elementwise(op) and uses[out_slot] == 1 and out_slot != program.output_slot 
+                and is_elementwise(consumer[out_slot][0]) 
+                and dims[consumer[out_slot][1]] == dims[out_slot]):
+            root_of[out_slot] = root_of[consumer[out_slot][1]]
+
+    groups = {}
+    for instruction in program.instructions:
+        groups.setdefault(root_of[instruction[1]], []).append(instruction)
+    return {root: group for root, group in groups.items() if len(group) > 1}
+
+
+def signature(program, backward=True, fuse=False):
+    return (backward, fuse, program.output_slot, tuple(program.dims),
+            tuple(program.requires_grad), tuple(slot for slot, _ in program.leaves),
+            tuple(program.instructions))
+
+
+def generate(program, backward=True, fuse=False):
+    # returns a plain Python function of the leaf values (as lists) that computes
+    # the output and, if `backward` is set, the gradients of all the leaves;
+    # with `fuse` set, chains of elementwise ops are computed in single passes
+    key = signature(program, backward, fuse)
+    fn = _cache.get(key)
+    if fn is None:
+        generator = _Generator(program, backward, fuse)
+        source = generator.generate()
+        namespace = generator.namespace
+        exec(compile(source, f'<autograd-codegen-{len(_cache)}>', 'exec'), namespace)
+        fn = _cache[key] = namespace['program']
+        fn.source = source
+    return fn
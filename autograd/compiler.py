@@ -0,0 +1,169 @@
+from . import backend, codegen, grad_mode
+from .grad import add_grad, grad_sort
+from .node import Node, Variable
+from .optimize import optimize_graph
+from .ops import UnaryOp, BinaryOp
+from .vector import Vector
+
+
+class Program:
+    # a traced graph linearized into a list of instructions over numbered slots:
+    # leaves are loaded into their slots, then every instruction
+    # `(op, out_slot, in_slots)` computes `op.fn` of the input slots
+
+    def __init__(self, top_node, placeholders):
+        nodes = list(reversed(list(grad_sort(top_node))))
+        if not all(isinstance(node.value, Vector) for node in nodes):
+            raise TypeError('compile supports only vector values')
+        slots = {id(node): slot for slot, node in enumerate(nodes)}
+        input_slots = {id(placeholder): idx for idx, placeholder in enumerate(placeholders)}
+
+        self.num_slots = len(nodes)
+        self.output_slot = slots[id(top_node)]
+        # leaves are either inputs (loaded from the arguments) or variables
+        # captured by the traced function (loaded from their current value)
+        self.leaves = []
+        self.instructions = []
+        self.requires_grad = [node.requires_grad for node in nodes]
+        self.dims = [node.dim for node in nodes]
+
+        for slot, node in enumerate(nodes):
+            if node.is_leaf:
+                source = input_slots.get(id(node), node)
+                self.leaves.append((slot, source))
+            elif isinstance(node, (UnaryOp, BinaryOp)) and node.fn is not None:
+                in_slots = tuple(slots[id(parent)] for parent in node.parents)
+                self.instructions.append((node.__class__, slot, in_slots))
+            else:
+                raise TypeError(f'{node.__class__.__name__} nodes '
+                                'are not supported by compile')
+
+    def load(self, inputs):
+        values = [None] * self.num_slots
+        for slot, source in self.leaves:
+            if isinstance(source, int):
+                value = inputs[source]
+                values[slot] = value.value if isinstance(value, Node) else value
+            else:
+                values[slot] = source.value
+        return values
+
+    def forward(self, inputs):
+        values = self.load(inputs)
+        for op, out_slot, in_slots in self.instructions:
+            values[out_slot] = op.fn(*[values[slot] for slot in in_slots])
+        return values
+
+    def run_generated(self, inputs, backward=True, fuse=False):
+        # runs the generated Python source of the program (see `codegen`)
+        fn = codegen.generate(self, backward, fuse)
+        values = self.load(inputs)
+        result = fn(*[backend.current.tolist(values[slot].data) for slot, _ in self.leaves])
+        if not backward:
+            return codegen.to_vector(result)
+        output, grads = result
+        return codegen.to_vector(output), [None if grad is None else codegen.to_vector(grad)
+                                            for grad in grads]
+
+    def backward(self, values, top_grad=None):
+        requires_grad = self.requires_grad
+        grads = [None] * self.num_slots
+        grads[self.output_slot] = (Vector.ones(values[self.output_slot].dim)
+                                   if top_grad is None else top_grad)
+        # whether the gradient buffer of a slot can be updated in place (see `add_grad`)
+        owned = [False] * self.num_slots
+
+        for op, out_slot, in_slots in reversed(self.instructions):
+            prev_grad = grads[out_slot]
+            if prev_grad is None:
+                continue
+            grads[out_slot] = None
+
+            parent_grads = op.backward(prev_grad, values[out_slot],
+                                       *[values[slot] for slot in in_slots],
+                                       [requires_grad[slot] for slot in in_slots])
+            for slot, parent_grad in zip(in_slots, parent_grads):
+                if parent_grad is None:
+                    continue
+                if grads[slot] is None:
+                    grads[slot] = parent_grad
+                    if parent_grad is not prev_grad:
+                        owned[slot] = True
+                else:
+                    grads[slot], owned[slot] = add_grad(grads[slot], parent_grad, owned[slot])
+
+        return grads
+
+
+class CompiledFunction:
+    # traces `fn` once per combination of input dimensions and replays the
+    # recorded program afterwards; the control flow of `fn` is fixed at tracing time
+
+    def __init__(self, fn, codegen=False, fuse=False, optimize=True):
+        self.fn = fn
+        self.codegen = codegen or fuse
+        self.fuse = fuse
+        self.optimize = optimize
+        self.programs = {}
+
+    @staticmethod
+    def _signature(inputs):
+        return tuple((input.dim, input.requires_grad) if isinstance(input, Node)
+                     else (input.dim, False) for input in inputs)
+
+    def program(self, *inputs):
+        signature = self._signature(inputs)
+        program = self.programs.get(signature)
+        if program is None:
+            # data inputs are replaced with placeholder variables
+            placeholders = [input if isinstance(input, Variable)
+                            else Variable(input, requires_grad=False) for input in inputs]
+            prev = grad_mode.is_grad_enabled()
+            grad_mode.set_grad_enabled(True)
+            try:
+                top_node = self.fn(*placeholders)
+            finally:
+                grad_mode.set_grad_enabled(prev)
+            if self.optimize:
+                # literals are folded, captured variables are read when the program runs
+                optimize_graph(top_node, keep=placeholders)
+            program = self.programs[signature] = Program(top_node, placeholders)
+        return program
+
+    def forward(self, *inputs):
+        program = self.program(*inputs)
+        if self.codegen:
+            return program.run_generated(inputs, backward=False, fuse=self.fuse)
+        return program.forward(inputs)[program.output_slot]
+
+    def __call__(self, *inputs):
+        # runs the forward and the backward pass, sets the gradients
+        # of the variables that require grad and returns the output value
+        program = self.program(*inputs)
+        if self.codegen:
+            output, leaf_grads = program.run_generated(inputs, fuse=self.fuse)
+        else:
+            values = program.forward(inputs)
+            grads = program.backward(values)
+            output = values[program.output_slot]
+            leaf_grads = [grads[slot] for slot, _ in program.leaves]
+
+        # a gradient passed through unchanged (e.g. by an addition) may reach several
+        # leaves, but leaves don't share their gradients (see `grad`)
+        assigned = set()
+        for (slot, source), leaf_grad in zip(program.leaves, leaf_grads):
+            if leaf_grad is None or not program.requires_grad[slot]:
+                continue
+            leaf = inputs[source] if isinstance(source, int) else source
+            leaf.grad = leaf_grad.copy() if id(leaf_grad) in assigned else leaf_grad
+            assigned.add(id(leaf_grad))
+
+        return output
+
+
+def compile(fn, codegen=False, fuse=False, optimize=True):
+    # with `codegen` set, programs are run as generated Python source
+    # instead of being interpreted instruction by instruction;
+    # `fuse` additionally merges chains of elementwise ops (implies `codegen`);
+    # `optimize` runs common-subexpression elimination and constant folding
+    return CompiledFunction(fn, codegen, fuse, optimize)
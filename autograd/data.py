@@ -0,0 +1,170 @@
+import csv
+import queue
+import random
+import threading
+from . import backend
+from .matrix import Matrix
+from .vector import Vector
+
+
+def _split(values, target):
+    # a record is a list of features, or a pair of features and a target
+    if target is None:
+        return values
+    target = target % len(values)
+    return values[:target] + values[target + 1:], values[target]
+
+
+class CSVDataset:
+    # records read lazily from the rows of a CSV file of numbers, one row at a time,
+    # so files larger than memory can be iterated over (also repeatedly, once per epoch);
+    # `target` is the index of the column that holds the target, if any
+
+    def __init__(self, path, target=None, header=False, delimiter=','):
+        self.path = path
+        self.target = target
+        self.header = header
+        self.delimiter = delimiter
+
+    def __iter__(self):
+        with open(self.path, newline='') as file:
+            reader = csv.reader(file, delimiter=self.delimiter)
+            if self.header:
+                next(reader, None)
+            for row in reader:
+                if row:
+                    yield _split([float(value) for value in row], self.target)
+
+
+class BinaryDataset:
+    # records of `record_size` doubles stored one after another in a binary file
+    # (e.g. written by `Vector.tofile`), read in chunks of `chunk_size` records
+
+    def __init__(self, path, record_size, target=None, chunk_size=1024):
+        if record_size < 1 or chunk_size < 1:
+            raise ValueError('record and chunk sizes must be positive')
+        self.path = path
+        self.record_size = record_size
+        self.target = target
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        size = self.record_size
+        with open(self.path, 'rb') as file:
+            while True:
+                chunk = file.read(8 * size * self.chunk_size)
+                if not chunk:
+                    break
+                if len(chunk) % (8 * size):
+                    raise ValueError('file ends with an incomplete record')
+                values = memoryview(chunk).cast('d').tolist()
+                for i in range(0, len(values), size):
+                    yield _split(values[i:i + size], self.target)
+
+
+def shuffled(records, buffer_size, rng=random):
+    # approximate shuffle with a bounded buffer: every record goes to a random slot
+    # of the buffer and the record it replaces is yielded, so only `buffer_size`
+    # records are held in memory at any time
+    buffer = []
+    for record in records:
+        if len(buffer) < buffer_size:
+            buffer.append(record)
+            continue
+        idx = rng.randrange(buffer_size)
+        yield buffer[idx]
+        buffer[idx] = record
+    rng.shuffle(buffer)
+    yield from buffer
+
+
+def collate(records):
+    # stacks the features of the records into the rows of a matrix
+    # (and their targets into a vector)
+    has_target = isinstance(records[0], tuple)
+    features = [record[0] for record in records] if has_target else records
+    dim = len(features[0])
+    if any(len(row) != dim for row in features):
+        raise ValueError('records of a batch have different numbers of features')
+    data = backend.current.asarray([value for row in features for value in row])
+    batch = Matrix._from_data(data, (len(features), dim))
+    if has_target:
+        return batch, Vector([record[1] for record in records])
+    return batch
+
+
+class DataLoader:
+    # iterates over mini-batches of a dataset (any iterable of records, e.g.
+    # `CSVDataset`), holding only the shuffle buffer and the prefetched batches
+    # in memory; with `prefetch` > 0 the next batches are read and collated
+    # on a background thread while the current one is used (e.g. by `grad`)
+
+    def __init__(self, dataset, batch_size, shuffle_buffer=0, drop_last=False,
+                 prefetch=1, seed=None):
+        if batch_size < 1:
+            raise ValueError('batch size must be positive')
+        if shuffle_buffer < 0 or prefetch < 0:
+            raise ValueError('shuffle buffer and prefetch must not be negative')
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer
+        self.drop_last = drop_last
+        self.prefetch = prefetch
+        self.rng = random.Random(seed)
+
+    def batches(self):
+        # the batches read on the calling thread
+        records = iter(self.dataset)
+        if self.shuffle_buffer > 1:
+            records = shuffled(records, self.shuffle_buffer, self.rng)
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == self.batch_size:
+                yield collate(batch)
+                batch = []
+        if batch and not self.drop_last:
+            yield collate(batch)
+
+    def __iter__(self):
+        if not self.prefetch:
+            yield from self.batches()
+            return
+
+        # the producer thread puts the batches (then a sentinel or its exception)
+        # into a bounded queue and stops early once the iteration is abandoned
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for batch in self.batches():
+                    if not put(batch):
+                        return
+                put(done)
+            except BaseException as exc:
+                put(exc)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
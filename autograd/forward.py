@@ -0,0 +1,58 @@
+from .grad import grad
+from .matrix import Matrix
+from .node import Dual, Node, Variable
+from .vector import Vector
+
+
+def _unit(dim, idx):
+    return Vector([1 if i == idx else 0 for i in range(dim)])
+
+
+def jvp(fn, primals, tangents):
+    # forward-mode differentiation: evaluates `fn` at `primals` and, in the same pass,
+    # its directional derivative along `tangents` (the Jacobian-vector product);
+    # the tangents are carried by `Dual` values, so no graph is built
+    primals = [Variable._to_vector(primal) for primal in primals]
+    tangents = [Variable._to_vector(tangent) for tangent in tangents]
+    if len(primals) != len(tangents):
+        raise ValueError('jvp requires a tangent for every primal')
+    for primal, tangent in zip(primals, tangents):
+        if primal.shape != tangent.shape:
+            raise ValueError('tangent must have the same shape as its primal')
+
+    out = fn(*[Dual(primal, tangent) for primal, tangent in zip(primals, tangents)])
+    if isinstance(out, Dual):
+        return out.value, out.tangent
+    # the output doesn't depend on the primals
+    value = out.value if isinstance(out, Node) else Variable._to_vector(out)
+    return value, value.fill(0)
+
+
+def jacobian(fn, x):
+    # the (m, n) Jacobian of a function from n to m elements; forward mode needs
+    # a pass per input and reverse mode a pass per output, so the cheaper one is used
+    x = Variable._to_vector(x)
+    if not isinstance(x, Vector):
+        raise ValueError('jacobian supports only vector inputs')
+    n = x.dim
+    value, tangent = jvp(fn, [x], [_unit(n, 0)])
+    if not isinstance(value, Vector):
+        raise ValueError('jacobian supports only vector outputs')
+    m = value.dim
+
+    if n <= m:
+        columns = [tangent.tolist()]
+        for j in range(1, n):
+            columns.append(jvp(fn, [x], [_unit(n, j)])[1].tolist())
+        return Matrix([list(row) for row in zip(*columns)])
+
+    # reverse mode, the graph is built once and walked once per output
+    variable = Variable(x)
+    out = fn(variable)
+    if not isinstance(out, Node) or not out.requires_grad:
+        return Matrix.zeros(m, n)
+    rows = []
+    for i in range(m):
+        row, = grad(out, wrt=[variable], top_grad=_unit(m, i))
+        rows.append(row.tolist() if row is not None else [0] * n)
+    return Matrix(rows)
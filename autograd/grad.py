@@ -1,41 +1,178 @@
-from .node import Node
-from .vector import Vector
+import builtins
+from .node import Node, Variable
+from .ops import IndexedSlices
 
 
-def grad_sort(top_node):
-    def topological_sort(node, visited):
-        if node in visited:
-            return []
-        visited.append(node)
+def grad_sort(top_node, requires_grad_only=False, stop=()):
+    # iterative depth-first search (graphs can be much deeper than the recursion limit);
+    # nodes are visited once, tracked by identity, so the sort is O(V + E);
+    # the nodes in `stop` are sorted as leaves, their parents aren't visited
+    visited = {id(top_node)}
+    stop = {id(node) for node in stop}
+    stack = [(top_node, iter(top_node.parents if id(top_node) not in stop else ()))]
+    nodes = []
 
-        if not node.parents:
-            return [node]
+    while stack:
+        node, parents = stack[-1]
+        for parent in parents:
+            if requires_grad_only and not parent.requires_grad:
+                continue
+            if id(parent) not in visited:
+                visited.add(id(parent))
+                stack.append((parent, iter(parent.parents if id(parent) not in stop else ())))
+                break
+        else:
+            stack.pop()
+            nodes.append(node)
 
-        nodes = []
-        for parent in node.parents:
-            nodes += topological_sort(parent, visited)
-        
-        return nodes + [node]
+    return reversed(nodes)
 
-    return reversed(topological_sort(top_node, []))
 
+def prune(nodes, wrt):
+    # keeps only the nodes (given in topological order, top node first) 
+    # from which at least one of the requested leaves can be reached
+    needed = {id(leaf) for leaf in wrt}
+    for node in reversed(nodes):
+        if builtins.any(id(parent) in needed for parent in node.parents):
+            needed.add(id(node))
+    return needed
 
-def grad(top_node):
+
+def add_grad(total, grad, owned):
+    # adds a gradient to the sum of the gradients flowing into a node and returns
+    # the new sum and whether its buffer is owned by the backward pass; an owned sum
+    # is updated in place, while the first gradient may be shared with another node 
+    # (e.g. an addition passes its gradient through to both parents) and is copied once
+    if isinstance(total, Node) or isinstance(grad, Node):
+        # gradients built of nodes (see `create_graph`) are never updated in place
+        return total + grad, False
+    elif isinstance(grad, IndexedSlices) and owned:
+        return grad.to_dense(out=total), True
+    elif isinstance(grad, IndexedSlices) or not owned:
+        total = total + grad
+        return total, not isinstance(total, IndexedSlices)
+    total += grad
+    return total, True
+
+
+def grad(top_node, wrt=None, retain_graph=True, top_grad=None, optimize=False,
+         accumulate=False, create_graph=False):
     # if top_node.dim != 1:
     #     raise RuntimeError('grad can be created only for scalar outputs')
 
     # TODO: add warning when requiring grad of leaf nodes (leaf node is a top node)
 
+    # with `accumulate` set, the gradients are added to the existing `grad` of the leaves
+    # (in place), e.g. to sum the gradients of several micro-batches
+
+    # with `create_graph` set, the backward pass is built of nodes, so the gradients 
+    # are nodes too and can be differentiated again (e.g. for Hessian-vector products);
+    # the graph of the top node is part of the new graph and can't be released
+
+    if not top_node.requires_grad:
+        raise RuntimeError('top node does not depend on any variable that requires grad')
+    if top_node.released:
+        raise RuntimeError('graph of the top node was already released by the backward pass, '
+                           'use grad(..., retain_graph=True) to backward through it again')
+    if create_graph and not retain_graph:
+        raise ValueError('create_graph requires retain_graph')
+
+    if optimize:
+        from .optimize import optimize_graph
+        optimize_graph(top_node)
+
+    nodes = list(grad_sort(top_node, requires_grad_only=True))
+
+    if wrt is not None:
+        for leaf in wrt:
+            if not leaf.requires_grad:
+                raise ValueError('one of the variables in wrt does not require grad')
+        needed = prune(nodes, wrt)
+    else:
+        needed = {id(node) for node in nodes}
+
     dct = {}
-    dct[top_node] = Vector.ones(top_node.dim)
+    dct[top_node] = top_node.value.fill(1) if top_grad is None else top_grad
+    # ids of the nodes whose gradient buffer is owned by this backward pass
+    owned = {id(top_node)} if top_grad is None else set()
+    if create_graph and not isinstance(dct[top_node], Node):
+        dct[top_node] = Variable(dct[top_node], requires_grad=False)
 
-    for node in grad_sort(top_node):
+    for node in nodes:
+        if id(node) not in needed or node not in dct:
+            continue
+
+        node_grad = dct[node]
+        if isinstance(node_grad, IndexedSlices):
+            # sparse gradients are scattered into a dense vector once all of them are summed
+            node_grad = dct[node] = node_grad.to_dense()
+            owned.add(id(node))
         if node.is_leaf:
+            if not create_graph and id(node) not in owned:
+                # leaves don't share their gradients with other nodes 
+                # (neither the `grad` nor the returned gradients)
+                node_grad = dct[node] = node_grad.copy()
+            if create_graph:
+                node.grad = (node_grad + node.grad if accumulate and node.grad is not None 
+                             else node_grad)
+            elif accumulate and node.grad is not None:
+                node.grad += node_grad
+            else:
+                node.grad = node_grad
             continue
 
-        for parent in node.parents:
-            dct[parent] = (dct.get(parent, Vector.zeros(parent.dim)) 
-                           + node.partial_derivative(dct[node], parent))
-            
-            if parent.is_leaf:
-                parent.grad = dct[parent]
\ No newline at end of file
+        # the gradients of all the parents are computed at once
+        needs_grad = [id(parent) in needed for parent in node.parents]
+        for parent, parent_grad in zip(node.parents, node.vjp(node_grad, needs_grad)):
+            if parent_grad is None:
+                continue
+            if parent in dct:
+                dct[parent], is_owned = add_grad(dct[parent], parent_grad, id(parent) in owned)
+                if is_owned:
+                    owned.add(id(parent))
+            else:
+                dct[parent] = parent_grad
+                # gradients passed through unchanged (e.g. by an addition) are shared
+                if (parent_grad is not node_grad and not create_graph
+                        and not isinstance(parent_grad, IndexedSlices)):
+                    owned.add(id(parent))
+
+        # the gradient of an intermediate node is no longer needed once 
+        # it has been propagated to the parents
+        del dct[node]
+        if not retain_graph:
+            node.release(keep_value=node is top_node)
+
+    if wrt is not None:
+        return [dct.get(leaf) for leaf in wrt]
+
+
+def hvp(fn, primals, tangents):
+    # Hessian-vector product of a scalar function: the gradients are built as nodes 
+    # (`create_graph`) and their dot product with the tangents is differentiated again, 
+    # so it costs a forward and two backward passes instead of building the whole Hessian
+    primals = [Variable(primal) for primal in primals]
+    tangents = [Variable._to_vector(tangent) for tangent in tangents]
+    if len(primals) != len(tangents):
+        raise ValueError('hvp requires a tangent for every primal')
+    for primal, tangent in zip(primals, tangents):
+        if primal.shape != tangent.shape:
+            raise ValueError('tangent must have the same shape as its primal')
+
+    out = fn(*primals)
+    value = out.value if isinstance(out, Node) else Variable._to_vector(out)
+    if value.shape != (1,):
+        raise ValueError('hvp requires a function with a scalar output')
+    zeros = [primal.value.fill(0) for primal in primals]
+    if not isinstance(out, Node) or not out.requires_grad:
+        return value, zeros
+
+    grads = grad(out, wrt=primals, create_graph=True)
+    products = [(g * tangent).sum() for g, tangent in zip(grads, tangents) if g is not None]
+    total = builtins.sum(products[1:], products[0]) if products else None
+    if not isinstance(total, Node) or not total.requires_grad:
+        # the gradients don't depend on the primals (e.g. a linear function)
+        return value, zeros
+    products = grad(total, wrt=primals)
+    return value, [zero if product is None else product 
+                   for zero, product in zip(zeros, products)]
@@ -0,0 +1,43 @@
+import contextlib
+import threading
+
+
+class _State(threading.local):
+    # when disabled, operations on nodes are computed eagerly on the underlying 
+    # vectors and return plain vectors instead of building the computation graph;
+    # the mode is set per thread (e.g. `no_grad` doesn't affect the prefetching
+    # thread of a `DataLoader`), every thread starts with it enabled
+    enabled = True
+
+
+_state = _State()
+
+
+def is_grad_enabled():
+    return _state.enabled
+
+
+def set_grad_enabled(mode):
+    _state.enabled = bool(mode)
+
+
+class no_grad(contextlib.ContextDecorator):
+
+    def __init__(self):
+        # the modes to restore, per thread, since a decorated function may run in several
+        self._local = threading.local()
+
+    @property
+    def prev(self):
+        if not hasattr(self._local, 'prev'):
+            self._local.prev = []
+        return self._local.prev
+
+    def __enter__(self):
+        self.prev.append(is_grad_enabled())
+        set_grad_enabled(False)
+        return self
+
+    def __exit__(self, *exc):
+        set_grad_enabled(self.prev.pop())
+        return False
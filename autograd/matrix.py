@@ -0,0 +1,443 @@
+from collections.abc import Sequence
+import builtins
+import math
+import numbers
+import operator
+from . import backend
+from .vector import Vector
+
+
+def broadcast_shapes(shape_one, shape_two):
+    # shapes are aligned from the right and axes of length 1 are stretched
+    shape = []
+    for one, two in zip(reversed((1,) * (2 - len(shape_one)) + tuple(shape_one)),
+                        reversed((1,) * (2 - len(shape_two)) + tuple(shape_two))):
+        if one != two and 1 not in (one, two):
+            raise ValueError(f'operands of shapes {shape_one} and {shape_two} '
+                             'aren\'t broadcastable')
+        shape.append(builtins.max(one, two))
+    return tuple(reversed(shape))
+
+
+def outer(vector_one, vector_two):
+    data = backend.current.matmul(vector_one.data, vector_two.data,
+                                  vector_one.dim, 1, vector_two.dim)
+    return Matrix._from_data(data, (vector_one.dim, vector_two.dim))
+
+
+class Matrix:
+    # 2-D array stored row by row in the flat data of the current backend; the
+    # strides (in elements) of a matrix may differ from the row-major ones, which
+    # makes transposes and row slices views that share the data of their base
+
+    def __init__(self, rows):
+        if not (isinstance(rows, Sequence)
+                and builtins.all(isinstance(row, (Sequence, Vector)) for row in rows)):
+            raise TypeError('rows argument is not a sequence of sequences')
+
+        rows = [row.tolist() if isinstance(row, Vector) else list(row) for row in rows]
+        if len({len(row) for row in rows}) > 1:
+            raise ValueError('rows of the matrix have different lengths')
+        data = [v for row in rows for v in row]
+        if not builtins.all(isinstance(v, numbers.Number) for v in data):
+            raise ValueError('rows argument contains an element that is not a number')
+
+        self.data = backend.current.asarray(data)
+        self.shape = (len(rows), len(rows[0]) if rows else 0)
+        self.strides = (self.shape[1], 1)
+        self.offset = 0
+
+    @classmethod
+    def _from_data(cls, data, shape, strides=None, offset=0):
+        # trusted construction path for data produced by the library (see `Vector`)
+        matrix = cls.__new__(cls)
+        matrix.data = data
+        matrix.shape = tuple(shape)
+        matrix.strides = (shape[1], 1) if strides is None else tuple(strides)
+        matrix.offset = offset
+        return matrix
+
+    @classmethod
+    def frombuffer(cls, buffer, shape, offset=0):
+        # row-major matrix over the doubles stored in a bytes-like object (see `Vector`)
+        rows, cols = shape
+        return cls._from_data(backend.current.frombuffer(buffer, offset, rows * cols), shape)
+
+    def __reduce__(self):
+        # see `Vector.__reduce__`
+        if not backend.current.isdouble(self.data):
+            return (Matrix, (self.tolist(),))
+        data = backend.current.memoryview(self.contiguous().data)
+        return (Matrix.frombuffer, (bytearray(data), self.shape))
+
+    @classmethod
+    def zeros(cls, rows, cols):
+        return cls._from_data(backend.current.full(rows * cols, 0), (rows, cols))
+
+    @classmethod
+    def ones(cls, rows, cols):
+        return cls._from_data(backend.current.full(rows * cols, 1), (rows, cols))
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def is_contiguous(self):
+        return (self.offset == 0 and self.strides == (self.shape[1], 1)
+                and len(self.data) == self.size)
+
+    def contiguous(self):
+        if self.is_contiguous:
+            return self
+        data = backend.current.gather(self.data, self.shape, self.strides, self.offset)
+        return Matrix._from_data(data, self.shape)
+
+    def transpose(self):
+        # a view, the data is not copied
+        return Matrix._from_data(self.data, self.shape[::-1], self.strides[::-1], self.offset)
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    def copy(self):
+        data = self.contiguous().data
+        return Matrix._from_data(backend.current.copy(data), self.shape)
+
+    def fill(self, val):
+        return Matrix._from_data(backend.current.full(self.size, val), self.shape)
+
+    def item(self):
+        if self.size != 1:
+            raise ValueError('only one element matrices can be coverted to Python scalars')
+        return backend.current.scalar(self.data, self.offset)
+
+    def tolist(self):
+        data = backend.current.tolist(self.contiguous().data)
+        cols = self.shape[1]
+        return [data[i * cols:(i + 1) * cols] for i in range(self.shape[0])]
+
+    def row(self, idx):
+        rows, cols = self.shape
+        if not -rows <= idx < rows:
+            raise IndexError('row index out of range')
+        start = self.offset + (idx % rows) * self.strides[0]
+        stop = start + (cols - 1) * self.strides[1] + 1
+        return Vector._from_data(backend.current.view(self.data, slice(start, stop, 
+                                                                       self.strides[1]))
+                                 if cols else backend.current.full(0, 0))
+
+    def __getitem__(self, idx):
+        # an integer selects a row (as a vector), a pair of integers an element
+        # and a slice a range of rows (as a view)
+        if isinstance(idx, int):
+            return self.row(idx)
+        elif isinstance(idx, tuple) and len(idx) == 2 and builtins.all(isinstance(i, int)
+                                                                       for i in idx):
+            return self.row(idx[0])[idx[1]]
+        elif isinstance(idx, slice):
+            start, stop, step = idx.indices(self.shape[0])
+            if step < 0:
+                raise ValueError('slices with negative steps are not supported')
+            rows = len(range(start, stop, step))
+            return Matrix._from_data(self.data, (rows, self.shape[1]),
+                                     (self.strides[0] * step, self.strides[1]),
+                                     self.offset + start * self.strides[0])
+        raise TypeError('only integers, pairs of integers and slices are valid indices')
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.tolist()!r})'
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __float__(self):
+        return float(self.item())
+
+    def _unary_op(self, op):
+        data_new = backend.current.unary(self.contiguous().data, op)
+        return Matrix._from_data(data_new, self.shape)
+
+    def log(self):
+        return self._unary_op(math.log)
+
+    def log2(self):
+        return self._unary_op(math.log2)
+
+    def log10(self):
+        return self._unary_op(math.log10)
+
+    def log1p(self):
+        return self._unary_op(math.log1p)
+
+    def exp(self):
+        return self._unary_op(math.exp)
+
+    def abs(self):
+        return self._unary_op(operator.abs)
+
+    def __pos__(self):
+        return self
+
+    def neg(self):
+        return self * -1
+
+    def sin(self):
+        return self._unary_op(math.sin)
+
+    def cos(self):
+        return self._unary_op(math.cos)
+
+    def tan(self):
+        return self._unary_op(math.tan)
+
+    def sinh(self):
+        return self._unary_op(math.sinh)
+
+    def cosh(self):
+        return self._unary_op(math.cosh)
+
+    def tanh(self):
+        return self._unary_op(math.tanh)
+
+    def _expand(self, data, shape, target):
+        # brings contiguous data of a broadcastable shape to the target shape
+        if shape[0] != target[0]:
+            data = backend.current.tile(data, target[0])
+        if shape[1] != target[1]:
+            data = backend.current.repeat(data, target[1])
+        return data
+
+    def _binary_op(self, other, op, reflected=False):
+        # vectors are broadcast as rows, one-element operands as scalars
+        if isinstance(other, numbers.Number):
+            scalar = other
+        elif isinstance(other, (Vector, Matrix)) and other.shape in ((1,), (1, 1)):
+            scalar = other.item()
+        elif isinstance(other, Vector):
+            other = Matrix._from_data(other.data, (1, other.dim))
+            scalar = None
+        elif isinstance(other, Matrix):
+            other = other.contiguous()
+            scalar = None
+        else:
+            return NotImplemented
+
+        this = self.contiguous()
+        if scalar is not None:
+            if reflected:
+                data = backend.current.scalar_binary(scalar, this.data, op)
+            else:
+                data = backend.current.binary_scalar(this.data, scalar, op)
+            return Matrix._from_data(data, self.shape)
+
+        shape = broadcast_shapes(self.shape, other.shape)
+        data_one = self._expand(this.data, self.shape, shape)
+        data_two = self._expand(other.data, other.shape, shape)
+        if reflected:
+            data_one, data_two = data_two, data_one
+        return Matrix._from_data(backend.current.binary(data_one, data_two, op), shape)
+
+    def _inplace_op(self, other, op):
+        # updates the elements in place (see `Vector`), the result must keep the shape
+        if not self.is_contiguous:
+            raise ValueError('in-place operations need a contiguous matrix')
+        if isinstance(other, numbers.Number):
+            operand = other
+        elif isinstance(other, (Vector, Matrix)) and other.shape in ((1,), (1, 1)):
+            operand = other.item()
+        elif isinstance(other, (Vector, Matrix)):
+            if isinstance(other, Vector):
+                other = Matrix._from_data(other.data, (1, other.dim))
+            if broadcast_shapes(self.shape, other.shape) != self.shape:
+                raise ValueError(f'operand of shape {other.shape} can\'t be broadcast '
+                                 f'to the shape {self.shape} of the matrix')
+            operand = self._expand(other.contiguous().data, other.shape, self.shape)
+        else:
+            return NotImplemented
+        self.data = backend.current.inplace_binary(self.data, operand, op)
+        return self
+
+    def iadd(self, other):
+        return self._inplace_op(other, operator.add)
+
+    def isub(self, other):
+        return self._inplace_op(other, operator.sub)
+
+    def imul(self, other):
+        return self._inplace_op(other, operator.mul)
+
+    def idiv(self, other):
+        return self._inplace_op(other, operator.truediv)
+
+    def ipow(self, other):
+        return self._inplace_op(other, operator.pow)
+
+    def ifill(self, val):
+        if not self.is_contiguous:
+            raise ValueError('in-place operations need a contiguous matrix')
+        self.data = backend.current.ifill(self.data, val)
+        return self
+
+    def _check_operands(self, *others):
+        if not self.is_contiguous:
+            raise ValueError('in-place operations need a contiguous matrix')
+        if not builtins.all(isinstance(other, Matrix) and other.shape == self.shape 
+                            for other in others):
+            raise ValueError('operands must be matrices of the same shape')
+
+    def axpy(self, alpha, other):
+        # self += alpha * other in place
+        self._check_operands(other)
+        self.data = backend.current.axpy(self.data, alpha, other.contiguous().data)
+        return self
+
+    def addcmul(self, value, one, two):
+        # self += value * one * two in place
+        self._check_operands(one, two)
+        self.data = backend.current.addcmul(self.data, value, one.contiguous().data, 
+                                            two.contiguous().data)
+        return self
+
+    def addcdiv(self, value, one, two):
+        # self += value * one / two in place
+        self._check_operands(one, two)
+        self.data = backend.current.addcdiv(self.data, value, one.contiguous().data, 
+                                            two.contiguous().data)
+        return self
+
+    def sum(self, axis=None, keepdims=False):
+        # sums all the elements (into a one-element vector),
+        # the columns (axis=0) or the rows (axis=1)
+        data = self.contiguous().data
+        rows, cols = self.shape
+        if axis is None:
+            val = backend.current.sum(data)
+            if keepdims:
+                return Matrix._from_data(backend.current.full(1, val), (1, 1))
+            return Vector._from_data(backend.current.full(1, val))
+        elif axis == 0:
+            data, shape = backend.current.fold_sum(data, cols), (1, cols)
+        elif axis == 1:
+            data, shape = backend.current.segment_sum(data, cols), (rows, 1)
+        else:
+            raise ValueError('axis of a matrix must be 0, 1 or None')
+        return Matrix._from_data(data, shape) if keepdims else Vector._from_data(data)
+
+    def max(self):
+        # the largest of all the elements (as a one-element vector)
+        if not self.size:
+            raise ValueError('max of an empty matrix')
+        val = backend.current.max(self.contiguous().data)
+        return Vector._from_data(backend.current.full(1, val))
+
+    def add(self, other):
+        return self._binary_op(other, operator.add)
+
+    def __radd__(self, other):
+        return self._binary_op(other, operator.add, reflected=True)
+
+    def sub(self, other):
+        return self._binary_op(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self._binary_op(other, operator.sub, reflected=True)
+
+    def mul(self, other):
+        return self._binary_op(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self._binary_op(other, operator.mul, reflected=True)
+
+    def div(self, other):
+        return self._binary_op(other, operator.truediv)
+
+    def __rtruediv__(self, other):
+        return self._binary_op(other, operator.truediv, reflected=True)
+
+    def pow(self, other):
+        return self._binary_op(other, operator.pow)
+
+    def __rpow__(self, other):
+        return self._binary_op(other, operator.pow, reflected=True)
+
+    def matmul(self, other):
+        # matrix-matrix and matrix-vector products
+        rows, cols = self.shape
+        if isinstance(other, Matrix):
+            if other.shape[0] != cols:
+                raise ValueError(f'shapes {self.shape} and {other.shape} '
+                                 'aren\'t aligned for matmul')
+            data = backend.current.matmul(self.contiguous().data, other.contiguous().data,
+                                          rows, cols, other.shape[1])
+            return Matrix._from_data(data, (rows, other.shape[1]))
+        elif isinstance(other, Vector):
+            if other.dim != cols:
+                raise ValueError(f'shapes {self.shape} and {other.shape} '
+                                 'aren\'t aligned for matmul')
+            data = backend.current.matmul(self.contiguous().data, other.data, rows, cols, 1)
+            return Vector._from_data(data)
+        return NotImplemented
+
+    def __rmatmul__(self, other):
+        # vector-matrix product
+        if not isinstance(other, Vector):
+            return NotImplemented
+        rows, cols = self.shape
+        if other.dim != rows:
+            raise ValueError(f'shapes {other.shape} and {self.shape} '
+                             'aren\'t aligned for matmul')
+        data = backend.current.matmul(other.data, self.contiguous().data, 1, rows, cols)
+        return Vector._from_data(data)
+
+    def lt(self, other):
+        return self._binary_op(other, operator.lt)
+
+    def le(self, other):
+        return self._binary_op(other, operator.le)
+
+    def eq(self, other):
+        return self._binary_op(other, operator.eq)
+
+    def ne(self, other):
+        return self._binary_op(other, operator.ne)
+
+    def ge(self, other):
+        return self._binary_op(other, operator.ge)
+
+    def gt(self, other):
+        return self._binary_op(other, operator.gt)
+
+    def all(self):
+        return backend.current.all(self.contiguous().data)
+
+    def any(self):
+        return backend.current.any(self.contiguous().data)
+
+    __abs__ = abs
+    __neg__ = neg
+
+    __add__ = add
+    __sub__ = sub
+    __mul__ = mul
+    __truediv__ = div
+    __pow__ = pow
+    __matmul__ = matmul
+
+    __iadd__ = iadd
+    __isub__ = isub
+    __imul__ = imul
+    __itruediv__ = idiv
+    __ipow__ = ipow
+
+    __lt__ = lt
+    __le__ = le
+    __eq__ = eq
+    __ne__ = ne
+    __ge__ = ge
+    __gt__ = gt
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+import builtins
 import numbers
+from .matrix import Matrix
 from .vector import Vector
 # from .vector import (lt as Lt, le as Le, eq as Eq, ne as Ne, ge as Ge, gt as Gt, 
 #                      all as All, any as Any, fill as Fill)
@@ -7,16 +9,23 @@ from .vector import Vector
 
 class Node(ABC):
     id = 0
+    released = False
 
     def __init__(self, parents):
-        self.parents = [parent if isinstance(parent, Node) else Variable(parent) 
+        # constants are wrapped in variables that don't require grad
+        self.parents = [parent if isinstance(parent, Node) else Variable._literal(parent)
                         for parent in parents]
+        self.requires_grad = builtins.any(parent.requires_grad for parent in self.parents)
         self.id = Node.id
         Node.id += 1
 
     @property
     def dim(self):
         return self.value.dim
+
+    @property
+    def shape(self):
+        return self.value.shape
     
     @property
     def is_leaf(self):
@@ -29,9 +38,44 @@ class Node(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def partial_derivative(self, prev_grad, wrt):
+    def evaluate(self):
+        # computes the value of the node from the (cached) values of its parents
+        raise NotImplementedError
+
+    @abstractmethod
+    def vjp(self, prev_grad, needs_grad=None):
+        # vector-Jacobian product: the gradients of all the parents at once
+        # (in the order of `parents`), `None` for the parents not in `needs_grad`
         raise NotImplementedError
 
+    def partial_derivative(self, prev_grad, wrt):
+        # kept for compatibility, computes the gradient of a single parent
+        needs_grad = [parent is wrt for parent in self.parents]
+        grads = [grad for grad in self.vjp(prev_grad, needs_grad) if grad is not None]
+        return builtins.sum(grads) if grads else 0
+
+    def set_parents(self, parents):
+        # rewires the node to other (equivalent) parents, used by the graph optimizer
+        self.parents = list(parents)
+
+    def release(self, keep_value=False):
+        # drops the parent links (and the cached value) of a node 
+        # whose partial derivatives have been consumed by the backward pass
+        self.parents = []
+        if not keep_value:
+            self._value = None
+        self.released = True
+
+    def recompute(self):
+        # refreshes the cached values of the subgraph rooted at this node 
+        # (e.g. after the value of a variable has been replaced);
+        # every node is evaluated exactly once, after all of its parents
+        from .grad import grad_sort
+        for node in reversed(list(grad_sort(self))):
+            if not node.is_leaf:
+                node._value = node.evaluate()
+        return self
+
     def __repr__(self):
         return f'{self.__class__.__name__}({self.value})'
 
@@ -52,103 +96,139 @@ class Node(ABC):
 
     def abs(self):
         from .ops import Abs
-        return Abs(self)
+        return Abs.apply(self)
 
     def neg(self):
         from .ops import Neg
-        return Neg(self)
+        return Neg.apply(self)
     
     def log(self):
         from .ops import Log
-        return Log(self)
+        return Log.apply(self)
 
     def log2(self):
         from .ops import Log2
-        return Log2(self)
+        return Log2.apply(self)
     
     def log10(self):
         from .ops import Log10
-        return Log10(self)
+        return Log10.apply(self)
 
     def log1p(self):
         from .ops import Log1p
-        return Log1p(self)
+        return Log1p.apply(self)
 
     def exp(self):
         from .ops import Exp
-        return Exp(self)
+        return Exp.apply(self)
 
     def sin(self):
         from .ops import Sin
-        return Sin(self)
+        return Sin.apply(self)
     
     def cos(self):
         from .ops import Cos
-        return Cos(self)
+        return Cos.apply(self)
     
     def tan(self):
         from .ops import Tan
-        return Tan(self)
+        return Tan.apply(self)
     
     def sinh(self):
         from .ops import Sinh
-        return Sinh(self)
+        return Sinh.apply(self)
     
     def cosh(self):
         from .ops import Cosh
-        return Cosh(self)
+        return Cosh.apply(self)
     
     def tanh(self):
         from .ops import Tanh
-        return Tanh(self)
+        return Tanh.apply(self)
 
     def sigmoid(self):
         from .ops import Sigmoid
-        return Sigmoid(self)
+        return Sigmoid.apply(self)
 
     def relu(self):
         from .ops import ReLU
-        return ReLU(self)
+        return ReLU.apply(self)
     
     def sum(self):
         from .ops import Sum
-        return Sum(self)
+        return Sum.apply(self)
+
+    def mean(self):
+        from .ops import Mean
+        return Mean.apply(self)
+
+    def max(self):
+        from .ops import Max
+        return Max.apply(self)
+
+    def logsumexp(self):
+        from .ops import LogSumExp
+        return LogSumExp.apply(self)
+
+    def binary_cross_entropy_with_logits(self, target):
+        from .ops import BinaryCrossEntropyWithLogits
+        return BinaryCrossEntropyWithLogits.apply(self, target)
+
+    def softmax_cross_entropy(self, target):
+        from .ops import SoftmaxCrossEntropy
+        return SoftmaxCrossEntropy.apply(self, target)
 
     def add(self, other):
         from .ops import Add
-        return Add(self, other)
+        return Add.apply(self, other)
 
     def sub(self, other):
         from .ops import Sub
-        return Sub(self, other)
+        return Sub.apply(self, other)
 
     def __rsub__(self, other):
         from .ops import Sub
-        return Sub(other, self)
+        return Sub.apply(other, self)
 
     def mul(self, other):
         from .ops import Mul
-        return Mul(self, other)
+        return Mul.apply(self, other)
     
     def div(self, other):
         from .ops import Div
-        return Div(self, other)
+        return Div.apply(self, other)
 
     def __rtruediv__(self, other):
         from .ops import Div
-        return Div(other, self)
+        return Div.apply(other, self)
     
     def pow(self, other):
         from .ops import Pow
-        return Pow(self, other)
+        return Pow.apply(self, other)
 
     def __rpow__(self, other):
         from .ops import Pow
-        return Pow(other, self)
+        return Pow.apply(other, self)
 
     def matmul(self, other):
         from .ops import Matmul
-        return Matmul(self, other)
+        return Matmul.apply(self, other)
+
+    def __rmatmul__(self, other):
+        from .ops import Matmul
+        return Matmul.apply(other, self)
+
+    def __getitem__(self, idx):
+        from .ops import Index
+        return Index.apply(self, idx)
+
+    def transpose(self):
+        from .ops import Transpose
+        return Transpose.apply(self)
+
+    @property
+    def T(self):
+        return self.transpose()
 
     # def lt(self, other):
     #     return Lt(self.value, other.value)
@@ -182,7 +262,7 @@ class Node(ABC):
     __rmul__ = __mul__ = mul
     __truediv__ = div
     __pow__ = pow
-    __rmatmul__ = __matmul__ = matmul
+    __matmul__ = matmul
 
     # logic operations (not included in computation graph)
     # __lt__ = lt
@@ -197,24 +277,45 @@ class Node(ABC):
 
 
 class Variable(Node):
+    # anonymous constants created for the operands that aren't nodes (e.g. the 2 in `x * 2`);
+    # no one else refers to them, so the graph optimizer may fold and merge them
+    literal = False
 
-    def __init__(self, value):
+    def __init__(self, value, requires_grad=True):
         super().__init__([])
-
-        if isinstance(value, Vector):
-            self._value = value
-        elif isinstance(value, numbers.Number):
-            self._value = Vector([value])
-        else:
-            raise ValueError(f'{self.__class__.__name__} '
-                              'supports only Python scalars and vectors as values')
-        
+        self._value = self.__class__._to_vector(value)
         self._grad = None
+        self.requires_grad = requires_grad
 
     @property
     def value(self):
         return self._value
 
+    @value.setter
+    def value(self, value):
+        # nodes that depend on this variable keep their cached values 
+        # until `recompute` is called on them
+        self._value = self.__class__._to_vector(value)
+
+    @classmethod
+    def _literal(cls, value):
+        variable = cls(value, requires_grad=False)
+        variable.literal = True
+        return variable
+
+    @classmethod
+    def _to_vector(cls, value):
+        if isinstance(value, (Vector, Matrix)):
+            return value
+        elif isinstance(value, numbers.Number):
+            return Vector([value])
+        else:
+            raise ValueError(f'{cls.__name__} '
+                              'supports only Python scalars, vectors and matrices as values')
+
+    def evaluate(self):
+        return self._value
+
     @property
     def grad(self):
         return self._grad
@@ -226,9 +327,76 @@ class Variable(Node):
     # instances of this class are leafs in the computation graph 
     # and as such don't provide partial derivatives
     partial_derivative = None
+    vjp = None
     
     def copy(self):
-        return self.__class__(self._value)
+        return self.__class__(self._value, self.requires_grad)
 
     def fill(self, val):
-        return self.__class__(self._value.fill(val))
+        return self.__class__(self._value.fill(val), self.requires_grad)
+
+
+class Dual:
+    # a value paired with its tangent (the directional derivative of the value), 
+    # used by forward-mode differentiation (see `autograd.jvp`); it borrows the op 
+    # methods of `Node`, whose `apply` computes the value and the tangent of the result 
+    # right away, so no graph is built
+
+    def __init__(self, value, tangent):
+        self.value = value
+        self.tangent = tangent
+
+    @property
+    def dim(self):
+        return self.value.dim
+
+    @property
+    def shape(self):
+        return self.value.shape
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.value}, {self.tangent})'
+
+    abs = Node.abs
+    neg = Node.neg
+    log = Node.log
+    log2 = Node.log2
+    log10 = Node.log10
+    log1p = Node.log1p
+    exp = Node.exp
+    sin = Node.sin
+    cos = Node.cos
+    tan = Node.tan
+    sinh = Node.sinh
+    cosh = Node.cosh
+    tanh = Node.tanh
+    sigmoid = Node.sigmoid
+    relu = Node.relu
+    sum = Node.sum
+    mean = Node.mean
+    max = Node.max
+    logsumexp = Node.logsumexp
+    binary_cross_entropy_with_logits = Node.binary_cross_entropy_with_logits
+    softmax_cross_entropy = Node.softmax_cross_entropy
+    add = Node.add
+    sub = Node.sub
+    mul = Node.mul
+    div = Node.div
+    pow = Node.pow
+    matmul = Node.matmul
+    transpose = Node.transpose
+    T = Node.T
+
+    __abs__ = Node.__abs__
+    __neg__ = Node.__neg__
+    __radd__ = __add__ = Node.__add__
+    __sub__ = Node.__sub__
+    __rsub__ = Node.__rsub__
+    __rmul__ = __mul__ = Node.__mul__
+    __truediv__ = Node.__truediv__
+    __rtruediv__ = Node.__rtruediv__
+    __pow__ = Node.__pow__
+    __rpow__ = Node.__rpow__
+    __matmul__ = Node.__matmul__
+    __rmatmul__ = Node.__rmatmul__
+    __getitem__ = Node.__getitem__
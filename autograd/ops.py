@@ -1,219 +1,663 @@
+import builtins
 import math
-from .node import Node
+import numbers
+import operator
+from operator import methodcaller
+from . import backend, grad_mode
+from .matrix import Matrix, outer
+from .node import Dual, Node
 from .vector import Vector
 # from .vector import (abs, neg, log, log2, log10, log1p, exp, sin, cos, tan, sinh, cosh, tanh, 
 #                      pow, add, sub, mul, matmul, div, sum, fill)
 
 
-copy = Vector.copy
+# the ops dispatch on the type of their operands, 
+# so they apply to vectors and matrices alike
+copy = methodcaller('copy')
 ones = Vector.ones
 zeros = Vector.zeros
-abs = Vector.abs
-neg = Vector.neg
-log = Vector.log
-log2 = Vector.log2
-log10 = Vector.log10
-log1p = Vector.log1p
-exp = Vector.exp
-sin = Vector.sin
-cos = Vector.cos
-tan = Vector.tan
-sinh = Vector.sinh
-cosh = Vector.cosh
-tanh = Vector.tanh
-sum = Vector.sum
-add = Vector.add
-sub = Vector.sub
-mul = Vector.mul
-div = Vector.div
-pow = Vector.pow
-matmul = Vector.matmul
-lt = Vector.lt
-le = Vector.le
-eq = Vector.eq
-ge = Vector.ge
-ne = Vector.ne
-gt = Vector.gt
-all = Vector.all
-any = Vector.any
-fill = Vector.fill
+abs = operator.abs
+neg = operator.neg
+log = methodcaller('log')
+log2 = methodcaller('log2')
+log10 = methodcaller('log10')
+log1p = methodcaller('log1p')
+exp = methodcaller('exp')
+sin = methodcaller('sin')
+cos = methodcaller('cos')
+tan = methodcaller('tan')
+sinh = methodcaller('sinh')
+cosh = methodcaller('cosh')
+tanh = methodcaller('tanh')
+sum = methodcaller('sum')
+max = methodcaller('max')
+add = operator.add
+sub = operator.sub
+mul = operator.mul
+div = operator.truediv
+pow = operator.pow
+matmul = operator.matmul
+lt = operator.lt
+le = operator.le
+eq = operator.eq
+ge = operator.ge
+ne = operator.ne
+gt = operator.gt
+all = methodcaller('all')
+any = methodcaller('any')
 EPSILON = 1e-12
 
 
 def sigmoid(x):
     return 1 / (1 + exp(-x))
 
+def fill(x, val):
+    # the filled values are constants, also in a backward pass built of nodes
+    return value_of(x).fill(val)
+
+def dual_parts(x):
+    # value and tangent of an operand in forward mode (other operands are constants)
+    if isinstance(x, Dual):
+        return x.value, x.tangent
+    return value_of(x), None
+
+def value_of(x):
+    if isinstance(x, Node):
+        return x.value
+    elif isinstance(x, numbers.Number):
+        return Vector([x])
+    return x
+
+def sigmoid_grad(x):
+    s = sigmoid(x)
+    return s * (1 - s)
+
 def abs_grad(x):
-    return Vector([1 if v > 0 else 0 if v == 0 else -1 for v in x])
+    x = value_of(x)
+    return (x > 0) - (x < 0)
+
+def size(x):
+    x = value_of(x)
+    return x.size if isinstance(x, Matrix) else x.dim
+
+def logsumexp(x):
+    # shifted by the maximum, so exp doesn't overflow; an infinite maximum 
+    # (e.g. of elements that are all -inf) isn't shifted by
+    m = max(x).item()
+    if not math.isfinite(m):
+        m = 0
+    total = sum(exp(x - m))
+    if total.item() == 0:
+        return total.fill(-math.inf)
+    return log(total) + m
+
+def stable_sigmoid(v):
+    # sigmoid of a number that doesn't overflow for large negative numbers
+    if v >= 0:
+        return 1 / (1 + math.exp(-v))
+    return 1 - 1 / (1 + math.exp(v))
+
+def logistic(x):
+    if isinstance(x, Node):
+        return x.sigmoid()
+    return x._unary_op(stable_sigmoid)
+
+def bce_with_logits(z, y):
+    return builtins.max(z, 0) - z * y + math.log1p(math.exp(-builtins.abs(z)))
+
+def elementwise(x, y, op):
+    # applies a function of two numbers to the elements in a single pass, 
+    # broadcast like the arithmetic ops
+    result = x._binary_op(y, op)
+    if result is NotImplemented and isinstance(y, Matrix):
+        result = y._binary_op(x, op, reflected=True)
+    if result is NotImplemented:
+        raise TypeError('operands must be vectors, matrices or numbers')
+    return result
+
+def softmax_cross_entropy(z, y):
+    if not (isinstance(z, Vector) and isinstance(y, Vector) and z.dim == y.dim):
+        raise ValueError('softmax cross entropy requires vector logits and targets '
+                         'of the same dimension (the loss of a batch is summed over its samples)')
+    return sum(y) * logsumexp(z) - y @ z
+
+
+class IndexedSlices:
+    # sparse gradient of a vector of dimension `dim`: pieces `(idx, values)` 
+    # that add the values to the elements selected by `idx` (an integer or a slice);
+    # the gradients of many slices of a vector are summed by joining their pieces
+    # and are scattered into a single dense vector only once they are complete
+
+    def __init__(self, dim, pieces):
+        self.dim = dim
+        self.pieces = list(pieces)
+
+    @property
+    def shape(self):
+        return (self.dim,)
+
+    def to_dense(self, out=None):
+        out = Vector.zeros(self.dim) if out is None else out
+        for idx, values in self.pieces:
+            out.data = backend.current.scatter_add(out.data, idx, values.data)
+        return out
+
+    def __add__(self, other):
+        if isinstance(other, IndexedSlices):
+            return IndexedSlices(self.dim, self.pieces + other.pieces)
+        elif isinstance(other, Vector):
+            return self.to_dense(other.copy())
+        return NotImplemented
+
+    __radd__ = __add__
 
 
 class UnaryOp(Node):
     fn = None
     fn_grad = None
+    # derivative expressed in terms of the output of the op (e.g. `y * (1 - y)` 
+    # for the sigmoid), which reuses the cached forward value in the backward pass
+    fn_grad_out = None
+    # elementwise source templates of `fn` and `fn_grad` used by the code generator, 
+    # e.g. 'math.exp({0})', where {0} stands for an element of the parent
+    # and {out} for an element of the output
+    fn_src = None
+    fn_grad_src = None
+    # arguments of the op that aren't nodes (part of its identity for the graph optimizer)
+    attrs = ()
 
     def __init__(self, parent):
         super().__init__([parent])
         self.parent = self.parents[0]
+        self._value = self.evaluate()
+
+    @classmethod
+    def apply(cls, parent):
+        # builds the node, or in no-grad mode only computes its value;
+        # in forward mode computes the value and the tangent of the result
+        if isinstance(parent, Dual):
+            value = cls.fn(parent.value)
+            return Dual(value, cls.jvp(parent.tangent, value, parent.value))
+        if not grad_mode.is_grad_enabled():
+            return cls.fn(value_of(parent))
+        return cls(parent)
 
     @property
     def value(self):
+        if self._value is None:
+            raise RuntimeError('value of the node was released by the backward pass, '
+                               'use grad(..., retain_graph=True) to keep it')
+        return self._value
+
+    def evaluate(self):
         return self.__class__.fn(self.parent.value)
 
-    def partial_derivative(self, prev_grad, wrt):
-        if wrt == self.parent:
-            return prev_grad * self.__class__.fn_grad(self.parent.value)
-        return 0
+    def set_parents(self, parents):
+        super().set_parents(parents)
+        self.parent = self.parents[0]
+
+    def release(self, keep_value=False):
+        super().release(keep_value)
+        self.parent = None
+
+    def vjp(self, prev_grad, needs_grad=None):
+        if isinstance(prev_grad, Node):
+            # the backward rules are applied to the nodes themselves, 
+            # so the gradients can be differentiated again (see `grad(..., create_graph=True)`)
+            return self.__class__.backward(prev_grad, self, self.parent, needs_grad)
+        return self.__class__.backward(prev_grad, self.value, self.parent.value, needs_grad)
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_value, needs_grad=None):
+        # gradients of all the parents computed from plain vectors (no nodes needed)
+        if needs_grad is not None and not needs_grad[0]:
+            return (None,)
+        if cls.fn_grad_out is not None:
+            return (prev_grad * cls.fn_grad_out(value),)
+        return (prev_grad * cls.fn_grad(parent_value),)
+
+    @classmethod
+    def jvp(cls, tangent, value, parent_value):
+        # tangent of the output from the tangent of the parent (forward mode);
+        # for elementwise ops the Jacobian is diagonal, so it's the same product as in `backward`
+        return cls.backward(tangent, value, parent_value)[0]
 
 
 class Abs(UnaryOp):
     fn = abs
     fn_grad = abs_grad
+    fn_src = 'abs({0})'
+    fn_grad_src = '(({0} > 0) - ({0} < 0))'
 
 
 class Neg(UnaryOp):
     fn = neg
     fn_grad = lambda x: fill(x, -1)
+    fn_src = '-{0}'
+    fn_grad_src = '-1'
 
 
 class Sin(UnaryOp):
     fn = sin
     fn_grad = cos
+    fn_src = 'math.sin({0})'
+    fn_grad_src = 'math.cos({0})'
 
 
 class Cos(UnaryOp):
     fn = cos
     fn_grad = lambda x: -sin(x)
+    fn_src = 'math.cos({0})'
+    fn_grad_src = '-math.sin({0})'
 
 
 class Tan(UnaryOp):
     fn = tan
     fn_grad = lambda x: cos(x) ** -2
+    fn_src = 'math.tan({0})'
+    fn_grad_src = 'math.cos({0}) ** -2'
 
 
 class Log(UnaryOp):
     fn = log
     fn_grad = lambda x: 1 / (x + EPSILON)
+    fn_src = 'math.log({0})'
+    fn_grad_src = '1 / ({0} + EPSILON)'
 
 
 class Log2(UnaryOp):
     fn = log2
     fn_grad = lambda x: 1 / ((x * math.log(2)) + EPSILON)
+    fn_src = 'math.log2({0})'
+    fn_grad_src = f'1 / (({{0}} * {math.log(2)!r}) + EPSILON)'
 
 
 class Log10(UnaryOp):
     fn = log10
     fn_grad = lambda x: 1 / ((x * math.log(10)) + EPSILON)
+    fn_src = 'math.log10({0})'
+    fn_grad_src = f'1 / (({{0}} * {math.log(10)!r}) + EPSILON)'
 
 
 class Log1p(UnaryOp):
     fn = log1p
     fn_grad = lambda x: 1 / ((1 + x) + EPSILON)
+    fn_src = 'math.log1p({0})'
+    fn_grad_src = '1 / ((1 + {0}) + EPSILON)'
 
 
 class Exp(UnaryOp):
     fn = fn_grad = exp
+    fn_grad_out = lambda y: y
+    fn_src = 'math.exp({0})'
+    fn_grad_src = '{out}'
 
 
 class ReLU(UnaryOp):
     fn = lambda x: x * (x > 0)
-    fn_grad = lambda x: x > 0
+    fn_grad = lambda x: value_of(x) > 0
+    fn_grad_out = lambda y: value_of(y) > 0
+    fn_src = '{0} * ({0} > 0)'
+    fn_grad_src = '({out} > 0)'
 
 
 class Sigmoid(UnaryOp):
     fn = sigmoid
-    fn_grad = lambda x: sigmoid(x) * (1 - sigmoid(x)) 
+    fn_grad = sigmoid_grad
+    fn_grad_out = lambda y: y * (1 - y)
+    fn_src = '1 / (1 + math.exp(-{0}))'
+    fn_grad_src = '{out} * (1 - {out})'
 
 
 class Sinh(UnaryOp):
     fn = sinh
     fn_grad = cosh
+    fn_src = 'math.sinh({0})'
+    fn_grad_src = 'math.cosh({0})'
 
 
 class Cosh(UnaryOp):
     fn = cosh
     fn_grad = lambda x: sinh(x)
+    fn_src = 'math.cosh({0})'
+    fn_grad_src = 'math.sinh({0})'
 
 
 class Tanh(UnaryOp):
     fn = tanh
     fn_grad = lambda x: 1 - tanh(x) ** 2
+    fn_grad_out = lambda y: 1 - y ** 2
+    fn_src = 'math.tanh({0})'
+    fn_grad_src = '1 - {out} ** 2'
 
 
 class Sum(UnaryOp):
     fn = sum
     fn_grad = lambda x: fill(x, 1)
 
+    @classmethod
+    def jvp(cls, tangent, value, parent_value):
+        return tangent.sum()
+
+
+class Mean(UnaryOp):
+    fn = lambda x: sum(x) / size(x)
+    fn_grad = lambda x: fill(x, 1 / size(x))
+
+    @classmethod
+    def jvp(cls, tangent, value, parent_value):
+        return tangent.sum() / size(tangent)
+
+
+class Max(UnaryOp):
+    # the largest element, its gradient is split evenly between the elements equal to it
+    fn = max
+
+    @staticmethod
+    def mask(value, parent_value):
+        mask = value_of(parent_value) == value_of(value)
+        return mask / sum(mask).item()
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_value, needs_grad=None):
+        if needs_grad is not None and not needs_grad[0]:
+            return (None,)
+        return (prev_grad * cls.mask(value, parent_value),)
+
+    @classmethod
+    def jvp(cls, tangent, value, parent_value):
+        return (tangent * cls.mask(value, parent_value)).sum()
+
+
+class LogSumExp(UnaryOp):
+    # log(sum(exp(x))) in one stable pass, its gradient is the softmax of x
+    # computed from the output as exp(x - logsumexp(x))
+    fn = logsumexp
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_value, needs_grad=None):
+        if needs_grad is not None and not needs_grad[0]:
+            return (None,)
+        return (prev_grad * exp(parent_value - value),)
+
+    @classmethod
+    def jvp(cls, tangent, value, parent_value):
+        return (tangent * exp(parent_value - value)).sum()
+
+
+class Transpose(UnaryOp):
+    fn = methodcaller('transpose')
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_value, needs_grad=None):
+        if needs_grad is not None and not needs_grad[0]:
+            return (None,)
+        if isinstance(prev_grad, Node):
+            return (prev_grad.transpose(),)
+        # contiguous, so the gradient can be accumulated in place
+        return (prev_grad.transpose().contiguous(),)
+
+    @classmethod
+    def jvp(cls, tangent, value, parent_value):
+        return tangent.transpose()
+
+
+class Index(UnaryOp):
+    # selects an element (integer index) or a slice of a vector, the slice is 
+    # a view of the parent's value; the gradient is sparse (see `IndexedSlices`)
+
+    def __init__(self, parent, idx):
+        if not isinstance(idx, (int, slice)):
+            raise TypeError('only integers and slices are valid indices')
+        self.idx = idx
+        super().__init__(parent)
+
+    @classmethod
+    def apply(cls, parent, idx):
+        if isinstance(parent, Dual):
+            return Dual(parent.value[idx], parent.tangent[idx])
+        if not grad_mode.is_grad_enabled():
+            return value_of(parent)[idx]
+        if not isinstance(value_of(parent), Vector):
+            # the gradient (see `IndexedSlices` and `Scatter`) is a vector
+            raise TypeError('only vectors can be indexed in a graph, '
+                            'matrices can be indexed under no_grad')
+        return cls(parent, idx)
+
+    @property
+    def attrs(self):
+        idx = self.idx
+        return (idx,) if isinstance(idx, int) else ((idx.start, idx.stop, idx.step),)
+
+    def evaluate(self):
+        return self.parent.value[self.idx]
+
+    def vjp(self, prev_grad, needs_grad=None):
+        if needs_grad is not None and not needs_grad[0]:
+            return (None,)
+        if isinstance(prev_grad, Node):
+            return (Scatter.apply(prev_grad, self.parent.dim, self.idx),)
+        return (IndexedSlices(self.parent.dim, [(self.idx, prev_grad)]),)
+
+
+class Scatter(UnaryOp):
+    # places a vector at the elements `idx` of a vector of zeros of dimension `dim`, 
+    # the gradient of `Index` in a backward pass built of nodes
+
+    def __init__(self, parent, dim, idx):
+        self.dim_out = dim
+        self.idx = idx
+        super().__init__(parent)
+
+    @classmethod
+    def apply(cls, parent, dim, idx):
+        if isinstance(parent, Dual):
+            return Dual(cls.scatter(parent.value, dim, idx), cls.scatter(parent.tangent, dim, idx))
+        if not grad_mode.is_grad_enabled():
+            return cls.scatter(value_of(parent), dim, idx)
+        return cls(parent, dim, idx)
+
+    @staticmethod
+    def scatter(value, dim, idx):
+        return IndexedSlices(dim, [(idx, value)]).to_dense()
+
+    @property
+    def attrs(self):
+        idx = self.idx
+        return (self.dim_out, idx if isinstance(idx, int) else (idx.start, idx.stop, idx.step))
+
+    def evaluate(self):
+        return self.__class__.scatter(self.parent.value, self.dim_out, self.idx)
+
+    def vjp(self, prev_grad, needs_grad=None):
+        if needs_grad is not None and not needs_grad[0]:
+            return (None,)
+        grad = prev_grad[self.idx]
+        # a slice of a vector is a view, the gradient gets its own buffer
+        return (grad if isinstance(prev_grad, Node) else grad.copy(),)
+
 
 class BinaryOp(Node):
     fn = None
     fn_grad_one = None
     fn_grad_two = None
+    # elementwise source templates used by the code generator, 
+    # {0} and {1} stand for elements of the first and the second parent
+    fn_src = None
+    fn_grad_one_src = None
+    fn_grad_two_src = None
+    attrs = ()
 
     def __init__(self, parent_one, parent_two):
         super().__init__([parent_one, parent_two])
         self.parent_one = self.parents[0]
         self.parent_two = self.parents[1]
+        self._value = self.evaluate()
+
+    @classmethod
+    def apply(cls, parent_one, parent_two):
+        # builds the node, or in no-grad mode only computes its value;
+        # in forward mode computes the value and the tangent of the result
+        if isinstance(parent_one, Dual) or isinstance(parent_two, Dual):
+            (x, tangent_one), (y, tangent_two) = dual_parts(parent_one), dual_parts(parent_two)
+            value = cls.fn(x, y)
+            tangent = cls.jvp(tangent_one, tangent_two, value, x, y)
+            if tangent.shape != value.shape:
+                # the tangent of a broadcast operand
+                tangent = value.fill(0) + tangent
+            return Dual(value, tangent)
+        if not grad_mode.is_grad_enabled():
+            return cls.fn(value_of(parent_one), value_of(parent_two))
+        return cls(parent_one, parent_two)
 
     @property
     def value(self):
+        if self._value is None:
+            raise RuntimeError('value of the node was released by the backward pass, '
+                               'use grad(..., retain_graph=True) to keep it')
+        return self._value
+
+    def evaluate(self):
         return self.__class__.fn(self.parent_one.value, self.parent_two.value)
 
-    def partial_derivative(self, prev_grad, wrt):
-        max_dim = max(self.parent_one.value.dim, self.parent_two.value.dim)
-        parent_one_value = BinaryOp._broadcast_to_dim(self.parent_one.value, max_dim)
-        parent_two_value = BinaryOp._broadcast_to_dim(self.parent_two.value, max_dim)
-
-        if wrt == self.parent_one:
-            next_grad = prev_grad * self.__class__.fn_grad_one(parent_one_value, 
-                                                               parent_two_value)
-            # next_grad = prev_grad * self.__class__.fn_grad_one(self.parent_one.value, 
-            #                                                    self.parent_two.value)
-            return BinaryOp._reduce_to_dim(next_grad, self.parent_one.dim)
-        if wrt == self.parent_two:
-            next_grad = prev_grad * self.__class__.fn_grad_two(parent_one_value, 
-                                                               parent_two_value)
-            # next_grad = prev_grad * self.__class__.fn_grad_two(self.parent_one.value, 
-            #                                                    self.parent_two.value)
-            return BinaryOp._reduce_to_dim(next_grad, self.parent_two.dim)
-        return 0
+    def set_parents(self, parents):
+        super().set_parents(parents)
+        self.parent_one = self.parents[0]
+        self.parent_two = self.parents[1]
+
+    def release(self, keep_value=False):
+        super().release(keep_value)
+        self.parent_one = None
+        self.parent_two = None
+
+    def vjp(self, prev_grad, needs_grad=None):
+        if isinstance(prev_grad, Node):
+            return self.__class__.backward(prev_grad, self, self.parent_one, 
+                                           self.parent_two, needs_grad)
+        return self.__class__.backward(prev_grad, self.value, self.parent_one.value, 
+                                       self.parent_two.value, needs_grad)
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_one_value, parent_two_value, needs_grad=None):
+        # gradients of all the parents computed from plain vectors (no nodes needed);
+        # one-element operands are broadcast by the vector ops themselves,
+        # so they are never expanded into full vectors
+        need_one, need_two = needs_grad or (True, True)
+        grad_one = grad_two = None
+        if need_one:
+            grad_one = BinaryOp._chain(prev_grad, cls.fn_grad_one(parent_one_value, 
+                                                                  parent_two_value),
+                                       parent_one_value.shape)
+        if need_two:
+            grad_two = BinaryOp._chain(prev_grad, cls.fn_grad_two(parent_one_value, 
+                                                                  parent_two_value),
+                                       parent_two_value.shape)
+        return grad_one, grad_two
+
+    @classmethod
+    def jvp(cls, tangent_one, tangent_two, value, parent_one_value, parent_two_value):
+        # tangent of the output from the tangents of the parents (forward mode),
+        # a `None` tangent stands for a constant parent
+        tangent = None
+        if tangent_one is not None:
+            tangent = tangent_one * cls.fn_grad_one(parent_one_value, parent_two_value)
+        if tangent_two is not None:
+            tangent_two = tangent_two * cls.fn_grad_two(parent_one_value, parent_two_value)
+            tangent = tangent_two if tangent is None else tangent + tangent_two
+        return tangent
 
     @staticmethod
-    def _reduce_to_dim(vector, dim):
-        if dim == 1:
-            return sum(vector)
-        elif vector.dim == dim:
-            return vector
-        else:
-            raise ValueError('reduction is not possible '
-                             'due to mismatch in the number of dimensions')
-    
+    def _chain(prev_grad, local_grad, shape):
+        # multiplies the incoming gradient with the local derivative and reduces
+        # the result to the shape of the parent; for a broadcast one-element vector
+        # both steps are done at once as a dot product
+        if (shape == (1,) and isinstance(prev_grad, Vector) and isinstance(local_grad, Vector)
+                and prev_grad.dim == local_grad.dim != 1):
+            return prev_grad @ local_grad
+        return BinaryOp._reduce_to_shape(prev_grad * local_grad, shape)
+
     @staticmethod
-    def _broadcast_to_dim(vector, dim):
-        if vector.dim == 1:
-            return Vector.zeros(dim).fill(vector.item())
-        elif vector.dim == dim:
-            return vector
-        else:
-            raise ValueError('broadcast is not possible '
-                             'due to mismatch in the number of dimensions')
+    def _reduce_to_shape(grad, shape):
+        # sums the gradient of a broadcast operand over the broadcast axes
+        if grad.shape == shape:
+            return grad
+        elif shape == (1,):
+            return grad.sum()
+        is_matrix = isinstance(value_of(grad), Matrix)
+        if is_matrix and len(shape) == 1 and shape[0] == grad.shape[1]:
+            # vector broadcast to every row of a matrix
+            return BinaryOp._sum_axis(grad, 0)
+        elif is_matrix and len(shape) == 2:
+            for axis in (0, 1):
+                if shape[axis] == 1 and grad.shape[axis] != 1:
+                    grad = BinaryOp._sum_axis(grad, axis, keepdims=True)
+            if grad.shape == shape:
+                return grad
+        raise ValueError('reduction is not possible '
+                         'due to mismatch in the shapes')
+
+    @staticmethod
+    def _sum_axis(grad, axis, keepdims=False):
+        if not isinstance(grad, Node):
+            return grad.sum(axis=axis, keepdims=keepdims)
+        # nodes only sum all of their elements, 
+        # the sums over an axis are taken as products with ones
+        rows, cols = grad.shape
+        if axis == 0:
+            return (Matrix.ones(1, rows) if keepdims else Vector.ones(rows)) @ grad
+        return grad @ Matrix.ones(cols, 1)
 
 
 class Add(BinaryOp):
     fn = add
     fn_grad_one = lambda x, y: fill(x, 1)
     fn_grad_two = lambda x, y: fill(y, 1)
+    fn_src = '{0} + {1}'
+    fn_grad_one_src = '1'
+    fn_grad_two_src = '1'
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_one_value, parent_two_value, needs_grad=None):
+        # the local derivatives are ones, the incoming gradient is passed through
+        need_one, need_two = needs_grad or (True, True)
+        return (BinaryOp._reduce_to_shape(prev_grad, parent_one_value.shape) if need_one else None,
+                BinaryOp._reduce_to_shape(prev_grad, parent_two_value.shape) if need_two else None)
+
+    @classmethod
+    def jvp(cls, tangent_one, tangent_two, value, parent_one_value, parent_two_value):
+        if tangent_one is None or tangent_two is None:
+            return tangent_two if tangent_one is None else tangent_one
+        return tangent_one + tangent_two
 
 
 class Sub(BinaryOp):
     fn = sub
     fn_grad_one = lambda x, y: fill(x, 1)
     fn_grad_two = lambda x, y: fill(y, -1)
+    fn_src = '{0} - {1}'
+    fn_grad_one_src = '1'
+    fn_grad_two_src = '-1'
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_one_value, parent_two_value, needs_grad=None):
+        need_one, need_two = needs_grad or (True, True)
+        return (BinaryOp._reduce_to_shape(prev_grad, parent_one_value.shape) if need_one else None,
+                BinaryOp._reduce_to_shape(-prev_grad, parent_two_value.shape) if need_two else None)
+
+    @classmethod
+    def jvp(cls, tangent_one, tangent_two, value, parent_one_value, parent_two_value):
+        if tangent_two is None:
+            return tangent_one
+        return -tangent_two if tangent_one is None else tangent_one - tangent_two
 
 
 class Mul(BinaryOp):
     fn = mul
     fn_grad_one = lambda x, y: y
     fn_grad_two = lambda x, y: x
+    fn_src = '{0} * {1}'
+    fn_grad_one_src = '{1}'
+    fn_grad_two_src = '{0}'
 
 
 class Matmul(BinaryOp):
@@ -221,14 +665,123 @@ class Matmul(BinaryOp):
     fn_grad_one = lambda x, y: y
     fn_grad_two = lambda x, y: x
 
+    @classmethod
+    def backward(cls, prev_grad, value, parent_one_value, parent_two_value, needs_grad=None):
+        x, y = parent_one_value, parent_two_value
+        if isinstance(value_of(x), Vector) and isinstance(value_of(y), Vector):
+            # dot product
+            return super().backward(prev_grad, value, x, y, needs_grad)
+
+        need_one, need_two = needs_grad or (True, True)
+        if isinstance(value_of(y), Vector):
+            # matrix-vector product
+            grad_one = Outer.outer(prev_grad, y) if need_one else None
+            grad_two = prev_grad @ x if need_two else None
+        elif isinstance(value_of(x), Vector):
+            # vector-matrix product
+            grad_one = y @ prev_grad if need_one else None
+            grad_two = Outer.outer(x, prev_grad) if need_two else None
+        else:
+            grad_one = prev_grad @ y.T if need_one else None
+            grad_two = x.T @ prev_grad if need_two else None
+        return grad_one, grad_two
+
+    @classmethod
+    def jvp(cls, tangent_one, tangent_two, value, parent_one_value, parent_two_value):
+        tangent = None if tangent_one is None else tangent_one @ parent_two_value
+        if tangent_two is not None:
+            tangent_two = parent_one_value @ tangent_two
+            tangent = tangent_two if tangent is None else tangent + tangent_two
+        return tangent
+
+
+class Outer(BinaryOp):
+    # outer product of two vectors, the gradient of a matrix-vector product
+    # in a backward pass built of nodes
+    fn = outer
+
+    @staticmethod
+    def outer(u, v):
+        if isinstance(u, Node) or isinstance(v, Node):
+            return Outer.apply(u, v)
+        return outer(u, v)
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_one_value, parent_two_value, needs_grad=None):
+        need_one, need_two = needs_grad or (True, True)
+        return (prev_grad @ parent_two_value if need_one else None,
+                parent_one_value @ prev_grad if need_two else None)
+
+    @classmethod
+    def jvp(cls, tangent_one, tangent_two, value, parent_one_value, parent_two_value):
+        tangent = None if tangent_one is None else outer(tangent_one, parent_two_value)
+        if tangent_two is not None:
+            tangent_two = outer(parent_one_value, tangent_two)
+            tangent = tangent_two if tangent is None else tangent + tangent_two
+        return tangent
+
 
 class Div(BinaryOp):
     fn = div
     fn_grad_one = lambda x, y: 1 / y 
     fn_grad_two = lambda x, y: -x / y ** 2
+    fn_src = '{0} / {1}'
+    fn_grad_one_src = '1 / {1}'
+    fn_grad_two_src = '-{0} / {1} ** 2'
 
 
 class Pow(BinaryOp):
     fn = pow
     fn_grad_one = lambda x, y: y * x ** (y - 1)
     fn_grad_two = lambda x, y: log(x) * x ** y
+    fn_src = '{0} ** {1}'
+    fn_grad_one_src = '{1} * {0} ** ({1} - 1)'
+    fn_grad_two_src = 'math.log({0}) * {0} ** {1}'
+
+
+class BinaryCrossEntropyWithLogits(BinaryOp):
+    # binary cross entropy of the sigmoid of logits z and targets y, computed 
+    # elementwise in one pass as max(z, 0) - z * y + log(1 + exp(-|z|)), which neither 
+    # overflows nor needs EPSILON; the gradient of the logits is sigmoid(z) - y
+    fn = lambda z, y: elementwise(z, y, bce_with_logits)
+    fn_grad_one = lambda z, y: logistic(z) - y
+    fn_grad_two = lambda z, y: -z
+    fn_src = 'max({0}, 0) - {0} * {1} + math.log1p(math.exp(-abs({0})))'
+    fn_grad_one_src = ('(1 / (1 + math.exp(-{0})) if {0} >= 0 '
+                       'else 1 - 1 / (1 + math.exp({0}))) - {1}')
+    fn_grad_two_src = '-{0}'
+
+
+class SoftmaxCrossEntropy(BinaryOp):
+    # cross entropy of the softmax of logits z and a target distribution y (or the index 
+    # of the target class), sum(y) * logsumexp(z) - y @ z, in one stable pass;
+    # the gradient of the logits is softmax(z) * sum(y) - y
+    fn = softmax_cross_entropy
+
+    @classmethod
+    def apply(cls, logits, target):
+        if isinstance(target, numbers.Integral):
+            dim = logits.dim
+            if not -dim <= target < dim:
+                raise IndexError('target class out of range')
+            idx, target = target, Vector.zeros(dim)
+            target[idx] = 1
+        return super().apply(logits, target)
+
+    @classmethod
+    def backward(cls, prev_grad, value, parent_one_value, parent_two_value, needs_grad=None):
+        need_one, need_two = needs_grad or (True, True)
+        z, y = parent_one_value, parent_two_value
+        lse = LogSumExp.apply(z) if isinstance(z, Node) else logsumexp(z)
+        return (prev_grad * (exp(z - lse) * sum(y) - y) if need_one else None,
+                prev_grad * (lse - z) if need_two else None)
+
+    @classmethod
+    def jvp(cls, tangent_one, tangent_two, value, parent_one_value, parent_two_value):
+        z, y = parent_one_value, parent_two_value
+        lse = logsumexp(z)
+        tangent = None if tangent_one is None else tangent_one @ (exp(z - lse) * sum(y) - y)
+        if tangent_two is not None:
+            tangent_two = tangent_two @ (lse - z)
+            tangent = tangent_two if tangent is None else tangent + tangent_two
+        return tangent
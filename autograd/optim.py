@@ -0,0 +1,98 @@
+from .node import Variable
+
+
+class Optimizer:
+    # updates the values of the parameters in place from their gradients, so neither
+    # the variables nor their values are reallocated between the steps; the state
+    # of an optimizer is kept in buffers allocated once, in the constructor
+
+    def __init__(self, params, lr):
+        self.params = list(params)
+        if not self.params:
+            raise ValueError('optimizer got an empty list of parameters')
+        for param in self.params:
+            if not isinstance(param, Variable) or not param.requires_grad:
+                raise ValueError('parameters of an optimizer must be variables that require grad')
+        if lr <= 0:
+            raise ValueError('learning rate must be positive')
+        self.lr = lr
+
+    def zero_grad(self):
+        # the gradients are zeroed in place, so that `grad(..., accumulate=True)`
+        # sums the gradients of the next step into the same buffers
+        for param in self.params:
+            if param.grad is not None:
+                param.grad.ifill(0)
+
+    def step(self):
+        raise NotImplementedError
+
+
+class SGD(Optimizer):
+
+    def __init__(self, params, lr=0.01):
+        super().__init__(params, lr)
+
+    def step(self):
+        for param in self.params:
+            if param.grad is not None:
+                param.value.axpy(-self.lr, param.grad)
+
+
+class Momentum(Optimizer):
+    # SGD with momentum: v = momentum * v + grad, param -= lr * v
+
+    def __init__(self, params, lr=0.01, momentum=0.9):
+        super().__init__(params, lr)
+        if not 0 <= momentum < 1:
+            raise ValueError('momentum must be in [0, 1)')
+        self.momentum = momentum
+        self.velocities = [param.value.fill(0) for param in self.params]
+
+    def step(self):
+        for param, velocity in zip(self.params, self.velocities):
+            if param.grad is None:
+                continue
+            velocity *= self.momentum
+            velocity += param.grad
+            param.value.axpy(-self.lr, velocity)
+
+
+class Adam(Optimizer):
+    # Kingma & Ba, Adam: A Method for Stochastic Optimization (with bias correction)
+
+    def __init__(self, params, lr=0.001, betas=(0.9, 0.999), eps=1e-8):
+        super().__init__(params, lr)
+        if not all(0 <= beta < 1 for beta in betas):
+            raise ValueError('betas must be in [0, 1)')
+        self.betas = betas
+        self.eps = eps
+        self.steps = 0
+        self.means = [param.value.fill(0) for param in self.params]
+        self.variances = [param.value.fill(0) for param in self.params]
+        # scratch buffers for the denominators of the updates
+        self.denoms = [param.value.fill(0) for param in self.params]
+
+    def step(self):
+        beta_one, beta_two = self.betas
+        self.steps += 1
+        correction_one = 1 - beta_one ** self.steps
+        correction_two = 1 - beta_two ** self.steps
+        step_size = self.lr / correction_one
+
+        for param, mean, variance, denom in zip(self.params, self.means,
+                                                self.variances, self.denoms):
+            grad = param.grad
+            if grad is None:
+                continue
+            mean *= beta_one
+            mean.axpy(1 - beta_one, grad)
+            variance *= beta_two
+            variance.addcmul(1 - beta_two, grad, grad)
+
+            # denom = sqrt(variance / correction_two) + eps
+            denom.ifill(0)
+            denom.axpy(1 / correction_two, variance)
+            denom **= 0.5
+            denom += self.eps
+            param.value.addcdiv(-step_size, mean, denom)
@@ -0,0 +1,44 @@
+from .grad import grad_sort
+from .node import Variable
+from .ops import UnaryOp, BinaryOp
+
+
+def optimize_graph(top_node, keep=()):
+    # rewrites the graph rooted at the top node in place (the values don't change):
+    #  - subtrees whose leaves are all literals (see `Variable.literal`) are folded into 
+    #    constants; named variables, e.g. the captured variables of a compiled function, 
+    #    are never folded, since their values are read whenever the graph is evaluated
+    #  - op nodes with the same op (and attributes) and the same parents are merged into one
+    #    (hash-consing), as are literals wrapping the same vector or the same scalar
+    keep = {id(leaf) for leaf in keep}
+    constant = set()
+    canonical = {}
+    replaced = {}
+
+    for node in reversed(list(grad_sort(top_node))):
+        if not node.is_leaf:
+            parents = [replaced.get(id(parent), parent) for parent in node.parents]
+            if any(parent is not old for parent, old in zip(parents, node.parents)):
+                node.set_parents(parents)
+
+            if node is not top_node and all(id(parent) in constant for parent in parents):
+                folded = Variable._literal(node.value)
+                replaced[id(node)] = node = folded
+
+        if node.is_leaf:
+            if not node.literal or id(node) in keep:
+                continue
+            constant.add(id(node))
+            value = node.value
+            key = ('constant', value.item()) if value.shape == (1,) else ('constant', id(value))
+        elif isinstance(node, (UnaryOp, BinaryOp)):
+            key = (node.__class__, tuple(id(parent) for parent in node.parents), node.attrs)
+        else:
+            continue
+
+        if key in canonical:
+            replaced[id(node)] = canonical[key]
+        else:
+            canonical[key] = node
+
+    return top_node
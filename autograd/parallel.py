@@ -0,0 +1,126 @@
+import multiprocessing
+from multiprocessing import shared_memory
+from . import backend
+from .grad import grad
+from .matrix import Matrix
+from .node import Variable
+from .vector import Vector
+
+
+# state of a worker process, set once by `_init_worker` when the pool starts
+_worker = {}
+
+
+def _init_worker(loss_fn, name, layout, backend_name):
+    backend.set_backend(backend_name)
+    _worker['loss_fn'] = loss_fn
+    _worker['shm'] = shared_memory.SharedMemory(name=name)
+    _worker['layout'] = layout
+
+
+def _load_params(buffer, layout):
+    # the parameters are read from the shared memory without copying
+    # (except with the list backend, which can't share its storage)
+    params = []
+    for offset, shape in layout:
+        if len(shape) == 1:
+            value = Vector.frombuffer(buffer, offset, shape[0])
+        else:
+            value = Matrix.frombuffer(buffer, shape, offset)
+        params.append(Variable(value))
+    return params
+
+
+def _shard_grad(shard):
+    # forward and backward pass over one shard, the gradients are sent back
+    # to the parent process pickled as raw doubles (see `Vector.__reduce__`)
+    params = _load_params(_worker['shm'].buf, _worker['layout'])
+    loss = _worker['loss_fn'](params, shard)
+    if not loss.requires_grad:
+        return loss.value, [None] * len(params)
+    return loss.value, grad(loss, wrt=params)
+
+
+def _tree_reduce(values):
+    # sums the values pairwise, in place, level by level; the rounding errors grow
+    # with the logarithm of the number of shards instead of linearly
+    values = list(values)
+    while len(values) > 1:
+        for i in range(0, len(values) - 1, 2):
+            if values[i] is None:
+                values[i] = values[i + 1]
+            elif values[i + 1] is not None:
+                values[i] += values[i + 1]
+        values = values[::2]
+    return values[0]
+
+
+class GradMap:
+    # data-parallel gradients: the shards of a batch are processed by a pool
+    # of worker processes, each running the forward and the backward pass of
+    # `loss_fn(params, shard)` on its own core; the values of the parameters are
+    # broadcast to the workers through shared memory once per call, the gradients
+    # of the shards are summed into the `grad` of the parameters; the vectors of 
+    # the shards are pickled, except for vectors over shared memory or mapped files 
+    # (see `Vector.shared` and `Vector.mmap`), which the workers read in place
+
+    def __init__(self, loss_fn, params, workers=None):
+        self.params = list(params)
+        if not self.params:
+            raise ValueError('grad_map got an empty list of parameters')
+        for param in self.params:
+            if not isinstance(param, Variable) or not param.requires_grad:
+                raise ValueError('parameters of grad_map must be variables that require grad')
+
+        self.layout = []
+        offset = 0
+        for param in self.params:
+            self.layout.append((offset, param.shape))
+            offset += 8 * (param.value.size if isinstance(param.value, Matrix) else param.dim)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        try:
+            self.pool = multiprocessing.Pool(
+                workers, initializer=_init_worker,
+                initargs=(loss_fn, self.shm.name, self.layout, backend.get_backend()))
+        except BaseException:
+            self.shm.close()
+            self.shm.unlink()
+            raise
+
+    def _broadcast(self):
+        for param, (offset, _) in zip(self.params, self.layout):
+            value = param.value
+            data = value.contiguous().data if isinstance(value, Matrix) else value.data
+            source = backend.current.memoryview(data)
+            with self.shm.buf[offset:offset + 8 * len(source)] as raw, raw.cast('d') as target:
+                target[:] = source
+
+    def __call__(self, shards):
+        # returns the sum of the losses of the shards
+        shards = list(shards)
+        if not shards:
+            raise ValueError('grad_map requires at least one shard')
+        self._broadcast()
+        losses, grads = zip(*self.pool.map(_shard_grad, shards, chunksize=1))
+        for i, param in enumerate(self.params):
+            param.grad = _tree_reduce(shard_grads[i] for shard_grads in grads)
+        return _tree_reduce(losses)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def grad_map(loss_fn, params, shards, workers=None):
+    # a one-off `GradMap`, use the class directly to keep the workers between the steps;
+    # `loss_fn` has to be picklable (e.g. a module-level function)
+    with GradMap(loss_fn, params, workers) as fn:
+        return fn(shards)
@@ -1,55 +1,178 @@
 from collections.abc import Sequence
 import builtins
 import math
+import mmap
+from multiprocessing import shared_memory
 import numbers
 import operator
+from . import backend
+
+
+# blocks of shared memory attached by name by this process; they stay open until 
+# they are released (see `Vector.release_shared`), since views of their vectors 
+# may outlive the vectors
+_shared_blocks = {}
 
 
 class Vector:
 
     def __init__(self, data):
-        if not isinstance(data, Sequence):
+        if not (isinstance(data, Sequence) or backend.current.isnative(data)):
             raise TypeError('data argument is not a sequence')
 
         if not builtins.all(isinstance(v, numbers.Number) for v in data):
             raise ValueError('data argument contains an element that is not a number')
 
-        self.data = list(data)
+        # the elements are stored in the format of the current backend
+        self.data = backend.current.asarray(data)
+
+    @classmethod
+    def _from_data(cls, data):
+        # trusted construction path for data produced by the library, which is 
+        # already numeric and in the backend format, so the validation is skipped
+        vector = cls.__new__(cls)
+        vector.data = data
+        return vector
 
     @property
     def dim(self):
         return len(self.data)
 
+    @property
+    def shape(self):
+        return (self.dim,)
+
     def copy(self):
-        return Vector(self.data.copy())
+        return Vector._from_data(backend.current.copy(self.data))
 
     @classmethod
     def ones(cls, dim):
-        return cls([1] * dim)
+        return cls._from_data(backend.current.full(dim, 1))
 
     @classmethod
     def zeros(cls, dim):
-        return cls([0] * dim)
+        return cls._from_data(backend.current.full(dim, 0))
 
     def fill(self, val):
-        data_new = [val] * self.dim
-        return Vector(data_new)
+        data_new = backend.current.full(self.dim, val)
+        return Vector._from_data(data_new)
 
     def item(self):
         if self.dim != 1:
             raise ValueError('only one element vectors can be coverted to Python scalars')
-        return self.data[0]
+        return backend.current.scalar(self.data, 0)
 
     def tolist(self):
-        return self.data.copy()
+        return backend.current.tolist(self.data)
+
+    @classmethod
+    def frombuffer(cls, buffer, offset=0, count=-1):
+        # vector over the doubles stored in a bytes-like object (e.g. bytes, bytearray,
+        # mmap, array('d') or a NumPy array) that shares its memory, except with 
+        # the list backend; the vector is read-only if the buffer is
+        return cls._from_data(backend.current.frombuffer(buffer, offset, count))
+
+    def memoryview(self):
+        # the elements as a memoryview of doubles (a copy with the list backend)
+        return backend.current.memoryview(self.data)
+
+    def _set_source(self, constructor, *args):
+        # vectors that share the memory of a file or of a shared memory block are
+        # pickled as the arguments of their constructor, not as their elements;
+        # the last two arguments are the offset (in bytes) and the number of elements
+        if backend.current.shares_buffers:
+            self._source = (self.data, constructor, args)
+        return self
+
+    @classmethod
+    def mmap(cls, path, mode='r', offset=0, count=-1):
+        # vector over the doubles stored in a file (e.g. written by `tofile`) mapped 
+        # into memory, its pages are read only when its elements are accessed;
+        # the mode is 'r' (read-only), 'r+' (writes go to the file) or 'c' (copy-on-write);
+        # like `frombuffer`, it's a copy of the elements with the list backend
+        access = {'r': mmap.ACCESS_READ, 'r+': mmap.ACCESS_WRITE, 'c': mmap.ACCESS_COPY}
+        if mode not in access:
+            raise ValueError(f"unknown mode {mode!r}, expected one of 'r', 'r+', 'c'")
+        with open(path, 'r+b' if mode == 'r+' else 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=access[mode])
+        vector = cls.frombuffer(buffer, offset, count)
+        # changes of a copy-on-write mapping are private to the vector
+        return vector if mode == 'c' else vector._set_source(Vector.mmap, path, mode, 
+                                                              offset, count)
+
+    @classmethod
+    def from_file(cls, path, offset=0, count=-1):
+        # reads the doubles stored in a file into memory
+        with open(path, 'rb') as file:
+            file.seek(offset)
+            buffer = bytearray(file.read(-1 if count < 0 else 8 * count))
+        return cls.frombuffer(buffer)
+
+    def tofile(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.memoryview())
+
+    @classmethod
+    def shared(cls, block, offset=0, count=-1):
+        # vector over a block of shared memory (a `multiprocessing.shared_memory.SharedMemory`
+        # or its name), which is created and unlinked by its owner; the vector is passed 
+        # to other processes by the name of the block, so they read the same elements 
+        # without copying them (except with the list backend, see `frombuffer`)
+        if isinstance(block, shared_memory.SharedMemory):
+            # the caller keeps the block open while the vector is used
+            name, buffer = block.name, block.buf
+        else:
+            name = block
+            if name not in _shared_blocks:
+                _shared_blocks[name] = shared_memory.SharedMemory(name=name)
+            buffer = _shared_blocks[name].buf
+        vector = cls.frombuffer(buffer, offset, count)
+        return vector._set_source(Vector.shared, name, offset, count)
+
+    @staticmethod
+    def release_shared(name):
+        # closes a block attached by its name (e.g. by unpickling a vector over it) 
+        # once none of its vectors or their views are used any more
+        block = _shared_blocks.get(name)
+        if block is not None:
+            block.close()
+            del _shared_blocks[name]
+
+    def __reduce__(self):
+        source = getattr(self, '_source', None)
+        if source is not None and source[0] is self.data:
+            return source[1:]
+        if not backend.current.isdouble(self.data):
+            # e.g. complex numbers, or integers kept exact by the list backend
+            return (Vector, (self.tolist(),))
+        # pickled as the raw bytes of the doubles, which is compact with every backend 
+        # and works for views too; unpickled into a buffer of its own
+        return (Vector.frombuffer, (bytearray(self.memoryview()),))
+
+    def __buffer__(self, flags):
+        # buffer protocol for Python classes (Python 3.12+)
+        return self.memoryview()
+
+    def __array__(self, dtype=None, copy=None):
+        import numpy as np
+        return np.asarray(self.memoryview(), dtype=dtype)
 
     def __getitem__(self, idx):
         if not isinstance(idx, (int, slice)):
             raise TypeError('only integers and slices are valid indices')
         elif isinstance(idx, int):
-            return Vector([self.data[idx]])
+            val = backend.current.scalar(self.data, idx)
+            return Vector._from_data(backend.current.full(1, val))
         else:
-            return Vector(self.data[idx])
+            # a view that shares the storage with this vector (except with the list backend)
+            view = Vector._from_data(backend.current.view(self.data, idx))
+            source = getattr(self, '_source', None)
+            start, stop, step = idx.indices(self.dim)
+            if source is not None and source[0] is self.data and step == 1:
+                # contiguous views keep the source, moved to their first element
+                *args, offset, _ = source[2]
+                view._set_source(source[1], *args, offset + 8 * start, view.dim)
+            return view
     
     def __setitem__(self, idx, val):
         if not isinstance(idx, (int, slice)):
@@ -64,18 +187,19 @@ class Vector:
                     raise ValueError('value argument contains an element that is not a number')
                 if len(self.data[idx]) != len(val):
                     raise ValueError("number of indices doesn't match the number of values")
-                self.data[idx] = val
+                backend.current.setslice(self.data, idx, val)
             elif isinstance(val, numbers.Number):
-                self.data[idx] = [val] * len(range(*idx.indices(self.dim)))
+                self.data[idx] = backend.current.full(len(range(*idx.indices(self.dim))), val)
             else:
                 raise TypeError('value argument is not a sequence or a number') 
 
     def __delitem__(self, idx):
-        del self.data[idx]
+        self.data = backend.current.delete(self.data, idx)
 
     def __repr__(self):
+        data = self.tolist()
         return (f'{self.__class__.__name__}'
-                f'({repr(self.data) if self.dim != 1 else repr(self.data[0])})')
+                f'({repr(data) if self.dim != 1 else repr(data[0])})')
 
     def __len__(self):
         return self.dim
@@ -90,8 +214,8 @@ class Vector:
         return complex(self.item())
 
     def _unary_op(self, op):
-        data_new = [op(v) for v in self.data]
-        return Vector(data_new)
+        data_new = backend.current.unary(self.data, op)
+        return Vector._from_data(data_new)
 
     def log(self):
         return self._unary_op(math.log)
@@ -137,34 +261,136 @@ class Vector:
 
     def _binary_op(self, other, op):
         if isinstance(other, numbers.Number):
-            data = [op(v, other) for v in self.data]
+            data = backend.current.binary_scalar(self.data, other, op)
         elif isinstance(other, Vector):
             if self.dim == other.dim:
-                data = [op(u, v) for u, v in zip(self.data, other.data)]
+                data = backend.current.binary(self.data, other.data, op)
             elif self.dim == 1:
-                scalar = self[0].item()
-                data = [op(v, scalar) for v in other.data]
+                scalar = self.item()
+                data = backend.current.scalar_binary(scalar, other.data, op)
             elif other.dim == 1:
-                scalar = other[0].item()
-                data = [op(v, scalar) for v in self.data]
+                scalar = other.item()
+                data = backend.current.binary_scalar(self.data, scalar, op)
             else:
                 raise ValueError("operand dimensions don't match and aren't broadcastable")
         else:
             return NotImplemented
 
-        return Vector(data)
+        return Vector._from_data(data)
+
+    def _inplace_op(self, other, op):
+        # updates the elements in place, so views and buffers of the vector see the result
+        if isinstance(other, numbers.Number):
+            operand = other
+        elif isinstance(other, Vector):
+            if other.dim == self.dim:
+                operand = other.data
+            elif other.dim == 1:
+                operand = other.item()
+            else:
+                raise ValueError("operand dimensions don't match and aren't broadcastable")
+        else:
+            return NotImplemented
+        self.data = backend.current.inplace_binary(self.data, operand, op)
+        return self
+
+    def iadd(self, other):
+        return self._inplace_op(other, operator.add)
+
+    def isub(self, other):
+        return self._inplace_op(other, operator.sub)
+
+    def imul(self, other):
+        return self._inplace_op(other, operator.mul)
+
+    def idiv(self, other):
+        return self._inplace_op(other, operator.truediv)
+
+    def ipow(self, other):
+        return self._inplace_op(other, operator.pow)
+
+    def ifill(self, val):
+        self.data = backend.current.ifill(self.data, val)
+        return self
+
+    def _check_operands(self, *others):
+        if not builtins.all(isinstance(other, Vector) and other.dim == self.dim 
+                            for other in others):
+            raise ValueError('operands must be vectors of the same dimension')
+
+    def axpy(self, alpha, other):
+        # self += alpha * other in place, without a temporary for `alpha * other`
+        self._check_operands(other)
+        self.data = backend.current.axpy(self.data, alpha, other.data)
+        return self
+
+    def addcmul(self, value, one, two):
+        # self += value * one * two in place
+        self._check_operands(one, two)
+        self.data = backend.current.addcmul(self.data, value, one.data, two.data)
+        return self
+
+    def addcdiv(self, value, one, two):
+        # self += value * one / two in place
+        self._check_operands(one, two)
+        self.data = backend.current.addcdiv(self.data, value, one.data, two.data)
+        return self
+
+    def _rbinary_op(self, other, op):
+        # reflected operation with a Python scalar as the left operand
+        if not isinstance(other, numbers.Number):
+            return NotImplemented
+        return Vector._from_data(backend.current.scalar_binary(other, self.data, op))
     
     def sum(self):
-        return Vector([builtins.sum(self.data)])
+        val = backend.current.sum(self.data)
+        return Vector._from_data(backend.current.full(1, val))
+
+    def max(self):
+        if not self.dim:
+            raise ValueError('max of an empty vector')
+        val = backend.current.max(self.data)
+        return Vector._from_data(backend.current.full(1, val))
+
+    # a batch of vectors of the same dimension is stored as consecutive 
+    # segments of one flat vector (see `autograd.vmap`)
+
+    def tile(self, reps):
+        # the whole vector repeated `reps` times
+        return Vector._from_data(backend.current.tile(self.data, reps))
+
+    def repeat(self, reps):
+        # every element repeated `reps` times
+        return Vector._from_data(backend.current.repeat(self.data, reps))
+
+    def segment_sum(self, size):
+        # sums of the consecutive segments of length `size`
+        self._check_segments(size)
+        return Vector._from_data(backend.current.segment_sum(self.data, size))
+
+    def segment_max(self, size):
+        # maxima of the consecutive segments of length `size`
+        self._check_segments(size)
+        return Vector._from_data(backend.current.segment_max(self.data, size))
+
+    def fold_sum(self, size):
+        # elementwise sum of the consecutive segments of length `size`
+        self._check_segments(size)
+        return Vector._from_data(backend.current.fold_sum(self.data, size))
+
+    def _check_segments(self, size):
+        if size < 1 or self.dim % size:
+            raise ValueError(f'vector of dimension {self.dim} '
+                             f'can\'t be split into segments of length {size}')
 
     def add(self, other):
         return self._binary_op(other, operator.add)
 
     def sub(self, other):
-        return self + (-other)
+        return self._binary_op(other, operator.sub)
 
     def __rsub__(self, other):
-        return -self + other
+        return self._rbinary_op(other, operator.sub)
 
     def mul(self, other):
         return self._binary_op(other, operator.mul)
@@ -173,22 +399,21 @@ class Vector:
         return self._binary_op(other, operator.truediv)
 
     def __rtruediv__(self, other):
-        return (self ** -1) * other
+        return self._rbinary_op(other, operator.truediv)
     
     def pow(self, other):
         return self._binary_op(other, operator.pow)
 
     def __rpow__(self, other):
-        if not isinstance(other, numbers.Number):
-            return NotImplemented
-        return Vector.zeros(self.dim).fill(other).pow(self)
+        return self._rbinary_op(other, operator.pow)
     
     def matmul(self, other):
         if not isinstance(other, Vector):
-            raise TypeError('one of the operands is not a vector')
+            return NotImplemented
         if self.dim != other.dim:
             raise ValueError("operand dimensions don't match")
-        return (self * other).sum()
+        val = backend.current.dot(self.data, other.data)
+        return Vector._from_data(backend.current.full(1, val))
 
     def lt(self, other):
         return self._binary_op(other, operator.lt)
@@ -209,10 +434,10 @@ class Vector:
         return self._binary_op(other, operator.gt)
     
     def all(self):
-        return builtins.all(self)
+        return backend.current.all(self.data)
 
     def any(self):
-        return builtins.any(self)
+        return backend.current.any(self.data)
 
     __abs__ = abs
     __neg__ = neg
@@ -224,6 +449,12 @@ class Vector:
     __pow__ = pow
     __rmatmul__ = __matmul__ = matmul
 
+    __iadd__ = iadd
+    __isub__ = isub
+    __imul__ = imul
+    __itruediv__ = idiv
+    __ipow__ = ipow
+
     __lt__ = lt
     __le__ = le
     __eq__ = eq
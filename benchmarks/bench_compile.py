@@ -0,0 +1,81 @@
+import time
+import autograd as ag
+
+
+dim = 100
+w = ag.Variable(ag.Vector([0.01 * i for i in range(dim)]))
+b = ag.Variable(0.5)
+mu = ag.Variable(ag.Vector([0.5] * 10_000))
+sigma = ag.Variable(ag.Vector([2.0] * 10_000))
+
+
+def loss_fn(x, y):
+    model = ag.sigmoid(w @ x + b)
+    return -(y * ag.log(model) + (1 - y) * ag.log(1 - model))
+
+
+def pointwise_fn(y):
+    # a long chain of elementwise ops over a large vector
+    return (-0.5 * ((y - mu) / sigma) ** 2 - sigma.log()).sum()
+
+
+def eager(x, y):
+    loss = loss_fn(x, y)
+    ag.grad(loss)
+    return loss.value
+
+
+def eager_pointwise(y):
+    loss = pointwise_fn(y)
+    ag.grad(loss)
+    return loss.value
+
+
+def bench_pointwise(step, steps=20):
+    y = ag.Vector([1.0] * 10_000)
+    start = time.perf_counter()
+    for _ in range(steps):
+        step(y)
+    return (time.perf_counter() - start) / steps
+
+
+def bench(step, steps=2_000):
+    x = ag.Vector([0.1] * dim)
+    y = ag.Vector([1])
+    start = time.perf_counter()
+    for _ in range(steps):
+        step(x, y)
+    return (time.perf_counter() - start) / steps
+
+
+def bench_batch(batch_size=256, steps=5):
+    # one pass over a batch: per-sample graphs vs a single batched evaluation
+    xs = [ag.Vector([0.1 * (i % 7)] * dim) for i in range(batch_size)]
+    ys = [ag.Vector([i % 2]) for i in range(batch_size)]
+    batched = ag.vmap(loss_fn)
+    results = {}
+    for name, step in [('eager', lambda: [eager(x, y) for x, y in zip(xs, ys)]),
+                       ('vmap', lambda: batched(xs, ys))]:
+        start = time.perf_counter()
+        for _ in range(steps):
+            step()
+        results[name] = (time.perf_counter() - start) / steps
+    return results
+
+
+if __name__ == '__main__':
+    print('logistic regression (dim=100)')
+    for name, step in [('eager', eager), ('compile', ag.compile(loss_fn)),
+                       ('codegen', ag.compile(loss_fn, codegen=True)),
+                       ('fuse', ag.compile(loss_fn, fuse=True))]:
+        print(f'  {name:<8}: {bench(step) * 1e6:8.1f} us per step')
+
+    print('pointwise log-normal (dim=10000)')
+    for name, step in [('eager', eager_pointwise), ('compile', ag.compile(pointwise_fn)),
+                       ('codegen', ag.compile(pointwise_fn, codegen=True)),
+                       ('fuse', ag.compile(pointwise_fn, fuse=True))]:
+        print(f'  {name:<8}: {bench_pointwise(step) * 1e3:8.1f} ms per step')
+
+    print('logistic regression over a batch (dim=100, batch=256)')
+    for name, seconds in bench_batch().items():
+        print(f'  {name:<8}: {seconds * 1e3:8.1f} ms per batch')
@@ -0,0 +1,34 @@
+import time
+import autograd as ag
+
+
+def chain(depth):
+    # a single long path from the variable to the top node
+    v = ag.Variable(ag.Vector([0.5, 0.25]))
+    t = v
+    for _ in range(depth):
+        t = (t * 0.5).sin()
+    return t.sum()
+
+
+def fan(width):
+    # many short paths that all meet in the top node
+    v = ag.Variable(ag.Vector([0.5, 0.25]))
+    t = v.sin()
+    for _ in range(width):
+        t = t + v.cos()
+    return t.sum()
+
+
+def bench(build, size):
+    top_node = build(size)
+    start = time.perf_counter()
+    ag.grad(top_node)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    for name, build in [('depth', chain), ('width', fan)]:
+        for size in [1_000, 10_000, 100_000]:
+            elapsed = bench(build, size)
+            print(f'{name}={size:>7}: backward {elapsed:.3f}s ({elapsed / size * 1e6:.2f} us/op)')
@@ -0,0 +1,28 @@
+import time
+import autograd as ag
+
+
+def dense_loops(x_rows, w_cols):
+    # a dense layer written as dot products of vectors
+    return [[(x @ w).item() for w in w_cols] for x in x_rows]
+
+
+def bench(fn, *args, steps=5):
+    start = time.perf_counter()
+    for _ in range(steps):
+        fn(*args)
+    return (time.perf_counter() - start) / steps
+
+
+if __name__ == '__main__':
+    for name in ag.available_backends():
+        ag.set_backend(name)
+        for n in [64, 128]:
+            x = ag.Matrix([[0.01 * (i + j) for j in range(n)] for i in range(n)])
+            w = ag.Matrix([[0.01 * (i - j) for j in range(n)] for i in range(n)])
+            x_rows = [x[i] for i in range(n)]
+            w_cols = [w.T[j] for j in range(n)]
+            print(f'{name:<6} n={n:4}: vector loops {bench(dense_loops, x_rows, w_cols) * 1e3:8.2f} ms, '
+                  f'matmul {bench(lambda: x @ w) * 1e3:8.2f} ms, '
+                  f'matmul (transposed) {bench(lambda: x @ w.T) * 1e3:8.2f} ms')
+    ag.set_backend('list')
@@ -0,0 +1,37 @@
+import resource
+import subprocess
+import sys
+import autograd as ag
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def train(retain_graph, steps=300, dim=2_000, depth=10):
+    w = ag.Variable(ag.Vector([0.01] * dim))
+    x = ag.Vector([0.5] * dim)
+    losses = []
+
+    for step in range(1, steps + 1):
+        h = w * x
+        for _ in range(depth):
+            h = ag.tanh(h + w)
+        loss = h.sum()
+        ag.grad(loss, retain_graph=retain_graph)
+        # holding onto the losses (e.g. for logging) keeps their graphs alive
+        losses.append(loss)
+
+        if step % (steps // 5) == 0:
+            print(f'retain_graph={retain_graph!s:<5} step={step:>4}: '
+                  f'peak RSS {peak_rss_mb():7.1f} MB')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        train(sys.argv[1] == 'True')
+    else:
+        # peak RSS only grows, so every setting runs in a fresh process
+        for retain_graph in [False, True]:
+            subprocess.run([sys.executable, __file__, str(retain_graph)], check=True)
@@ -0,0 +1,43 @@
+import os
+import random
+import time
+import autograd as ag
+from autograd.parallel import GradMap
+
+
+def loss_fn(params, shard):
+    w, b = params
+    loss = 0
+    for x, y in shard:
+        model = ag.sigmoid(w @ x + b)
+        loss = loss - (y * ag.log(model) + (1 - y) * ag.log(1 - model))
+    return loss
+
+
+def dataset(size, dim):
+    rng = random.Random(0)
+    return [(ag.Vector([rng.gauss(0, 1) for _ in range(dim)]), rng.randint(0, 1))
+            for _ in range(size)]
+
+
+def shard(data, num_shards):
+    size = -(-len(data) // num_shards)
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+if __name__ == '__main__':
+    dim = 100
+    data = dataset(5_000, dim)
+    params = [ag.Variable(ag.Vector.zeros(dim)), ag.Variable(0)]
+
+    start = time.perf_counter()
+    ag.grad(loss_fn(params, data))
+    print(f'serial:     {time.perf_counter() - start:.3f}s')
+
+    for workers in sorted({2, 4, os.cpu_count() or 1}):
+        with GradMap(loss_fn, params, workers=workers) as fn:
+            shards = shard(data, workers)
+            fn(shards)  # warm up the workers
+            start = time.perf_counter()
+            fn(shards)
+            print(f'workers={workers:>2}: {time.perf_counter() - start:.3f}s')
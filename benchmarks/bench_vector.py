@@ -0,0 +1,37 @@
+import sys
+import time
+import autograd as ag
+
+# memory and time per op of the backends; the 'array' storage takes a quarter
+# of the memory of 'list' but its ops are slower, since every element is converted
+# to and from a double (e.g. 3.1 vs 2.3 ms at dim 10k and 350 vs 280 ms at 1M),
+# which is why 'list' stays the default; 'numpy' is both compact and fast
+
+
+def storage_bytes(vector):
+    data = vector.data
+    if isinstance(data, list):
+        # the list holds pointers to boxed numbers
+        return sys.getsizeof(data) + sum(sys.getsizeof(v) for v in data)
+    return sys.getsizeof(data)
+
+
+def bench(dim, repeat=5):
+    v = ag.Vector([i / dim for i in range(dim)])
+    w = ag.Vector([1 - i / dim for i in range(dim)])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ((v * w + v).exp() @ w).item()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    return storage_bytes(v) / dim, elapsed
+
+
+if __name__ == '__main__':
+    for dim in [10_000, 100_000, 1_000_000]:
+        for name in ag.available_backends():
+            ag.set_backend(name)
+            bytes_per_element, elapsed = bench(dim)
+            print(f'dim={dim:>9} backend={name:<6}: {bytes_per_element:5.1f} bytes/element, '
+                  f'{elapsed * 1e3:8.2f} ms per (v * w + v).exp() @ w')
@@ -0,0 +1,243 @@
+import math
+import unittest
+import autograd as ag
+from autograd import codegen
+
+
+class TestCompile(unittest.TestCase):
+
+    def setUp(self):
+        self.w = ag.Variable(ag.Vector([-0.5, 0.3, 1]))
+        self.b = ag.Variable(2)
+
+    def loss_fn(self, x, y):
+        model = ag.sigmoid(self.w @ x + self.b)
+        return -(y * ag.log(model) + (1 - y) * ag.log(1 - model))
+
+    def assertGradsEqual(self, x, y):
+        loss = self.loss_fn(x, y)
+        ag.grad(loss)
+        expected = [loss.value.tolist(), self.w.grad.tolist(), self.b.grad.tolist()]
+
+        self.w.grad = self.b.grad = None
+        value = self.compiled(x, y)
+        for actual, expected in zip([value, self.w.grad, self.b.grad], expected):
+            for a, e in zip(actual.tolist(), expected):
+                self.assertAlmostEqual(a, e, places=12)
+
+    def test_replay(self):
+        self.compiled = ag.compile(self.loss_fn)
+        self.assertGradsEqual(ag.Vector([10, 0.4, 3.5]), ag.Vector([1]))
+        self.assertEqual(len(self.compiled.programs), 1)
+
+        self.assertGradsEqual(ag.Vector([-1, 2, 0.5]), ag.Vector([0]))
+        self.assertEqual(len(self.compiled.programs), 1)
+
+        # replaying the program doesn't create any nodes
+        node_id = ag.Node.id
+        self.compiled(ag.Vector([3, 1, -2]), ag.Vector([1]))
+        self.assertEqual(ag.Node.id, node_id)
+
+    def test_parameter_update(self):
+        self.compiled = ag.compile(self.loss_fn)
+        x, y = ag.Vector([10, 0.4, 3.5]), ag.Vector([1])
+        self.compiled(x, y)
+        # captured variables are read when the program runs
+        self.w.value = self.w.value - self.w.grad * 0.1
+        self.assertGradsEqual(x, y)
+
+    def test_optimize(self):
+        w = ag.Variable(ag.Vector([1, 2]))
+
+        def fn(x):
+            return (x * w).sum().exp() * ag.exp(0.5) + (x * w).sum().exp()
+
+        x = ag.Vector([0.5, -0.25])
+        compiled = ag.compile(fn)
+        compiled(x)
+        # the repeated subexpression is computed once, the constant is folded
+        self.assertEqual(len(compiled.program(x).instructions), 5)
+        self.assertAlmostEqual(w.grad[0].item(), 
+                               0.5 * math.exp(0) * (1 + math.exp(0.5)), places=12)
+
+    def test_captured_constant(self):
+        w = ag.Variable(ag.Vector([1, 1]))
+        scale = ag.Variable(0.5, requires_grad=False)
+
+        def fn(x):
+            return (x * w).sum() * scale + (x * w).sum() * 0.5
+
+        x = ag.Vector([1, 2])
+        for compiled, args in [(ag.compile(fn), (x,)), (ag.vmap(fn), ([x],))]:
+            with self.subTest(compiled=type(compiled).__name__):
+                scale.value = 0.5
+                compiled(*args)
+                # a captured variable isn't merged with a literal of the same value
+                # and is read when the program runs
+                scale.value = 2.0
+                self.assertEqual(compiled(*args).item(), 7.5)
+                self.assertEqual(w.grad.tolist(), [2.5, 5])
+
+        scale.value = 0.5
+        h = fn(ag.Variable(x, requires_grad=False))
+        ag.grad(h, optimize=True)
+        scale.value = 2.0
+        self.assertEqual(h.recompute().value.item(), 7.5)
+
+    def test_shared_grad(self):
+        a = ag.Variable(ag.Vector([1, 2]))
+        b = ag.Variable(ag.Vector([3, 4]))
+        x = ag.Vector([0.5, 0.5])
+        for compiled, args in [(ag.compile(lambda x: ((a + b) * x).sum()), (x,)),
+                               (ag.vmap(lambda x: ((a + b) * x).sum()), ([x],))]:
+            with self.subTest(compiled=type(compiled).__name__):
+                compiled(*args)
+                # the addition passes the same gradient to both leaves
+                self.assertIsNot(a.grad, b.grad)
+                ag.grad((a * 2).sum(), accumulate=True)
+                self.assertEqual(a.grad.tolist(), [2.5, 2.5])
+                self.assertEqual(b.grad.tolist(), [0.5, 0.5])
+
+    def test_forward(self):
+        compiled = ag.compile(lambda x, w: (x * w).sum())
+        w = ag.Variable(ag.Vector([1, 2]))
+        self.assertEqual(compiled.forward(ag.Vector([3, 4]), w).item(), 11)
+        compiled(ag.Vector([3, 4]), w)
+        self.assertEqual(w.grad.tolist(), [3, 4])
+
+    def test_unsupported(self):
+        m = ag.Variable(ag.Matrix([[1, 2], [3, 4]]))
+        with self.assertRaises(TypeError):
+            ag.compile(lambda x: (m @ x).sum())(ag.Vector([1, 2]))
+        with self.assertRaises(TypeError):
+            ag.vmap(lambda x: x[0] * self.b)([[1, 2], [3, 4]])
+
+    def test_codegen(self):
+        self.compiled = ag.compile(self.loss_fn, codegen=True)
+        self.assertGradsEqual(ag.Vector([10, 0.4, 3.5]), ag.Vector([1]))
+        self.assertGradsEqual(ag.Vector([-1, 2, 0.5]), ag.Vector([0]))
+
+        program = self.compiled.program(ag.Vector([0, 0, 0]), ag.Vector([0]))
+        self.assertIn('math.exp(', codegen.generate(program).source)
+        # graphs with the same signature share the generated function
+        other = ag.compile(self.loss_fn, codegen=True)
+        self.assertIs(codegen.generate(other.program(ag.Vector([1, 1, 1]), ag.Vector([1]))),
+                      codegen.generate(program))
+
+    def test_codegen_broadcast(self):
+        w = ag.Variable(ag.Vector([0.5, -1, 2]))
+        b = ag.Variable(3)
+
+        def fn(x):
+            h = (w * b + x) ** 2 / b
+            return (h * h).sum() + (w @ x).exp() - ag.relu(b - h).sum()
+
+        x = ag.Vector([1, 2, -0.5])
+        loss = fn(x)
+        ag.grad(loss)
+        expected = [loss.value.item(), w.grad.tolist(), b.grad.tolist()]
+
+        compiled = ag.compile(fn, codegen=True)
+        self.assertAlmostEqual(compiled.forward(x).item(), expected[0], places=10)
+        self.assertAlmostEqual(compiled(x).item(), expected[0], places=10)
+        for actual, expected in zip([w.grad.tolist(), b.grad.tolist()], expected[1:]):
+            for a, e in zip(actual, expected):
+                self.assertAlmostEqual(a, e, places=10)
+
+    def test_codegen_fused_loss(self):
+        def loss_fn(x, y):
+            return ag.binary_cross_entropy_with_logits(self.w @ x + self.b, y)
+
+        self.loss_fn = loss_fn
+        self.compiled = ag.compile(loss_fn, codegen=True)
+        for x, y in [(ag.Vector([10, 0.4, 3.5]), ag.Vector([1])),
+                     (ag.Vector([-800, 0, 1]), ag.Vector([0]))]:
+            self.assertGradsEqual(x, y)
+        program = self.compiled.program(x, y)
+        self.assertIn('math.log1p(', codegen.generate(program).source)
+
+    def test_fuse(self):
+        mu = ag.Variable(ag.Vector([5, 1, 2]))
+        sigma = ag.Variable(ag.Vector([2, 1.5, 3]))
+
+        def fn(y):
+            return (-0.5 * ((y - mu) / sigma) ** 2 - sigma.log()).sum()
+
+        y = ag.Vector([10, 2, 1])
+        loss = fn(y)
+        ag.grad(loss)
+        expected = [loss.value.tolist(), mu.grad.tolist(), sigma.grad.tolist()]
+
+        compiled = ag.compile(fn, fuse=True)
+        program = compiled.program(y)
+        groups = codegen.fusion_groups(program)
+        # every elementwise op is merged into the single kernel feeding the sum
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(len(next(iter(groups.values()))), len(program.instructions) - 1)
+
+        value = compiled(y)
+        for actual, expected in zip([value, mu.grad, sigma.grad], expected):
+            for a, e in zip(actual.tolist(), expected):
+                self.assertAlmostEqual(a, e, places=10)
+
+        self.compiled = ag.compile(self.loss_fn, fuse=True)
+        self.assertGradsEqual(ag.Vector([10, 0.4, 3.5]), ag.Vector([1]))
+
+    def test_vmap(self):
+        xs = [[10, 0.4, 3.5], [-1, 2, 0.5], [3, 1, -2]]
+        ys = [1, 0, 1]
+        expected_losses, expected_w, expected_b = [], [], []
+        for x, y in zip(xs, ys):
+            loss = self.loss_fn(ag.Vector(x), ag.Vector([y]))
+            ag.grad(loss)
+            expected_losses.append(loss.value.item())
+            expected_w.append(self.w.grad.tolist())
+            expected_b.append(self.b.grad.item())
+
+        batched = ag.vmap(self.loss_fn)
+        losses = batched(xs, ys)
+        for a, e in zip(losses.tolist(), expected_losses):
+            self.assertAlmostEqual(a, e, places=12)
+        for a, e in zip(self.w.grad.tolist(), map(sum, zip(*expected_w))):
+            self.assertAlmostEqual(a, e, places=12)
+        self.assertAlmostEqual(self.b.grad.item(), sum(expected_b), places=12)
+
+        # gradients of the shared arguments are returned per sample
+        batched = ag.vmap(lambda x, y, w, b: -ag.log(ag.sigmoid((w @ x + b) * (2 * y - 1))),
+                          in_axes=(0, 0, None, None))
+        losses, grads = batched.per_sample_grads(xs, ys, self.w, self.b)
+        self.assertEqual(grads[:2], [None, None])
+        for i in range(len(xs)):
+            self.assertAlmostEqual(losses[i].item(), expected_losses[i], places=12)
+            for a, e in zip(grads[2][i].tolist(), expected_w[i]):
+                self.assertAlmostEqual(a, e, places=12)
+            self.assertAlmostEqual(grads[3][i].item(), expected_b[i], places=12)
+
+
+    def test_vmap_reductions(self):
+        w = ag.Variable(ag.Vector([0.5, -1, 2]))
+
+        def fn(x, y):
+            z = w * x
+            return (ag.mean(z) + ag.max(z * z) + ag.logsumexp(z) 
+                    + ag.softmax_cross_entropy(z, y) + ag.softmax_cross_entropy(z, 1))
+
+        # the squares of the second sample are all equal (a tie of the maxima)
+        xs = [[1, 2, 3], [-1, 0.5, 0.25], [2, 1, -3]]
+        ys = [[0.2, 0.3, 0.5], [1, 0, 0], [0, 0.5, 0.5]]
+        expected_losses, expected_w = [], []
+        for x, y in zip(xs, ys):
+            loss = fn(ag.Vector(x), ag.Vector(y))
+            ag.grad(loss)
+            expected_losses.append(loss.value.item())
+            expected_w.append(w.grad.tolist())
+
+        losses = ag.vmap(fn)(xs, ys)
+        for a, e in zip(losses.tolist(), expected_losses):
+            self.assertAlmostEqual(a, e, places=12)
+        for a, e in zip(w.grad.tolist(), map(sum, zip(*expected_w))):
+            self.assertAlmostEqual(a, e, places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+import autograd as ag
+from autograd.data import BinaryDataset, CSVDataset, DataLoader
+
+
+class TestData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rows = [[i, 0.5 * i, -i, i % 2] for i in range(23)]
+        self.csv_path = os.path.join(self.tmp.name, 'data.csv')
+        with open(self.csv_path, 'w') as file:
+            file.write('a,b,c,y\n')
+            file.writelines(','.join(map(str, row)) + '\n' for row in self.rows)
+        self.bin_path = os.path.join(self.tmp.name, 'data.bin')
+        ag.Vector([value for row in self.rows for value in row]).tofile(self.bin_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_datasets(self):
+        csv_records = list(CSVDataset(self.csv_path, target=-1, header=True))
+        bin_records = list(BinaryDataset(self.bin_path, 4, target=3, chunk_size=5))
+        self.assertEqual(csv_records, bin_records)
+        self.assertEqual(csv_records[3], ([3, 1.5, -3], 1))
+        # datasets can be iterated over once per epoch
+        self.assertEqual(len(list(CSVDataset(self.csv_path, header=True))), 23)
+
+    def test_loader(self):
+        dataset = CSVDataset(self.csv_path, target=-1, header=True)
+        for prefetch in [0, 2]:
+            with self.subTest(prefetch=prefetch):
+                loader = DataLoader(dataset, batch_size=5, shuffle_buffer=8,
+                                    prefetch=prefetch, seed=0)
+                batches = list(loader)
+                self.assertEqual([x.shape for x, _ in batches], [(5, 3)] * 4 + [(3, 3)])
+                rows = sorted(row + [y] for x, ys in batches
+                              for row, y in zip(x.tolist(), ys.tolist()))
+                self.assertEqual(rows, self.rows)
+                # the records are shuffled
+                self.assertNotEqual([row[0] for row in batches[0][0].tolist()], [0, 1, 2, 3, 4])
+
+        loader = DataLoader(BinaryDataset(self.bin_path, 4), batch_size=10, drop_last=True)
+        self.assertEqual([x.shape for x in loader], [(10, 4), (10, 4)])
+
+    def test_training(self):
+        w = ag.Variable(ag.Vector([0.1, -0.1, 0.2]))
+        b = ag.Variable(0)
+        loader = DataLoader(CSVDataset(self.csv_path, target=-1, header=True), batch_size=8)
+        for x, y in loader:
+            model = ag.sigmoid(x @ w + b)
+            loss = -(y * ag.log(model) + (1 - y) * ag.log(1 - model)).sum()
+            ag.grad(loss)
+            self.assertEqual(w.grad.shape, (3,))
+
+    def test_abandoned(self):
+        def records():
+            for i in range(100):
+                yield [i]
+            raise RuntimeError('broken dataset')
+
+        loader = DataLoader(records(), batch_size=10, prefetch=1)
+        for batch in loader:
+            break
+        with self.assertRaises(RuntimeError):
+            list(DataLoader(records(), batch_size=10, prefetch=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 import math
+import threading
 import unittest
 import autograd as ag
+from autograd.checkpoint import Checkpoint
+from autograd.grad import grad_sort
+from autograd.ops import IndexedSlices
 
 
 class TestGrad(unittest.TestCase):
@@ -47,6 +51,361 @@ class TestGrad(unittest.TestCase):
         self.assertAlmostEqual(mu.grad, 1.25, places=8)
         self.assertAlmostEqual(sigma.grad, 2.625, places=8)
 
+    def test_recompute(self):
+        w = ag.Variable(ag.Vector([1, 2]))
+        h = (w * w).sum()
+        self.assertEqual(h.value.item(), 5)
+
+        w.value = ag.Vector([3, 4])
+        # cached values are kept until the graph is recomputed
+        self.assertEqual(h.value.item(), 5)
+        h.recompute()
+        self.assertEqual(h.value.item(), 25)
+
+        ag.grad(h)
+        self.assertEqual(w.grad.tolist(), [6, 8])
+
+    def test_deep_graph(self):
+        # deeper than the default recursion limit
+        depth = 5000
+        v = ag.Variable(0.5)
+        t = v
+        for _ in range(depth):
+            t = t + v
+
+        ag.grad(t)
+        self.assertEqual(v.grad.item(), depth + 1)
+
+    def test_no_grad(self):
+        w = ag.Variable(ag.Vector([-0.5, 2, 3]))
+        b = ag.Variable(2)
+        x = ag.Vector([12, 3, 2])
+
+        node_id = ag.Node.id
+        with ag.no_grad():
+            h = ag.sigmoid(w @ x + b)
+        self.assertIsInstance(h, ag.Vector)
+        self.assertEqual(ag.Node.id, node_id)
+        self.assertTrue(ag.is_grad_enabled())
+
+        @ag.no_grad()
+        def predict(x):
+            return 1 - ag.sigmoid(w @ x + b)
+
+        self.assertAlmostEqual(predict(x).item(), 1 - h.item(), places=8)
+        self.assertAlmostEqual(ag.sigmoid(w @ x + b).value.item(), h.item(), places=8)
+
+        # the mode is set per thread
+        modes = []
+        thread = threading.Thread(target=lambda: modes.append(ag.is_grad_enabled()))
+        with ag.no_grad():
+            thread.start()
+            thread.join()
+        self.assertEqual(modes, [True])
+
+    def test_wrt(self):
+        w = ag.Variable(ag.Vector([-0.5, 2, 3]))
+        b = ag.Variable(2)
+        x = ag.Variable(ag.Vector([12, 3, 2]), requires_grad=False)
+
+        h = (w @ x + b) * 2 + w.sum()
+        self.assertFalse(h.parents[0].parents[1].requires_grad)
+
+        w_grad, = ag.grad(h, wrt=[w])
+        self.assertEqual(w_grad.tolist(), [25, 7, 5])
+        self.assertIs(w.grad, w_grad)
+        self.assertIsNone(b.grad)
+        self.assertIsNone(x.grad)
+
+        with self.assertRaises(ValueError):
+            ag.grad(h, wrt=[x])
+        with self.assertRaises(RuntimeError):
+            ag.grad(x.exp())
+
+    def test_release_graph(self):
+        w = ag.Variable(ag.Vector([1, 2]))
+        h = (w * w).exp()
+        loss = h.sum()
+
+        ag.grad(loss, retain_graph=False)
+        self.assertAlmostEqual(w.grad[1].item(), 4 * math.exp(4), places=8)
+        # the value of the top node is kept for logging
+        self.assertAlmostEqual(loss.value.item(), math.exp(1) + math.exp(4), places=8)
+        self.assertEqual(h.parents, [])
+        with self.assertRaises(RuntimeError):
+            h.value
+        with self.assertRaises(RuntimeError):
+            ag.grad(loss)
+
+    def test_checkpoint(self):
+        def segment(h, w):
+            for _ in range(10):
+                h = ag.tanh(h * w + 0.5)
+            return h
+
+        def loss_fn(w, use_checkpoint):
+            h = ag.Variable(ag.Vector([0.1, -0.2, 0.3]), requires_grad=False)
+            for _ in range(4):
+                h = ag.checkpoint(segment, h, w) if use_checkpoint else segment(h, w)
+            return h.sum()
+
+        w = ag.Variable(ag.Vector([0.9, 1.1, -0.7]))
+        loss = loss_fn(w, use_checkpoint=True)
+        self.assertIsInstance(loss.parents[0], Checkpoint)
+        ag.grad(loss)
+        w_grad = w.grad.tolist()
+
+        loss_true = loss_fn(w, use_checkpoint=False)
+        ag.grad(loss_true)
+        self.assertAlmostEqual(loss.value.item(), loss_true.value.item(), places=12)
+        for g, g_true in zip(w_grad, w.grad.tolist()):
+            self.assertAlmostEqual(g, g_true, places=12)
+
+        # segments whose output doesn't depend on the variables that require grad
+        x = ag.Variable(ag.Vector([0.1, 0.2, 0.3]), requires_grad=False)
+        for fn in [lambda x, w: x * 2, lambda x, w: ag.Vector([1, 2, 3])]:
+            w.grad = None
+            ag.grad((ag.checkpoint(fn, x, w) + w).sum())
+            self.assertEqual(w.grad.tolist(), [1, 1, 1])
+
+        # variables that require grad have to be passed as inputs
+        h = ag.checkpoint(lambda h: segment(h, w), ag.Variable(ag.Vector([0.1, 0.2, 0.3])))
+        with self.assertRaises(ValueError):
+            ag.grad(h.sum())
+
+    def test_optimize(self):
+        y = 10
+        mu = ag.Variable(5)
+        sigma = ag.Variable(2)
+        v7 = -0.5 * ((y - mu) / sigma) ** 2
+        v9 = v7 - sigma.log() - sigma.log()
+        v10 = v9 - 0.5 * ag.log(2 * math.pi)
+        value = v10.value.item()
+
+        num_nodes = len(list(grad_sort(v10)))
+        ag.grad(v10, optimize=True)
+        # the second `sigma.log()` is merged with the first one
+        # and `0.5 * ag.log(2 * math.pi)` (only literals) is folded into a constant
+        self.assertEqual(len(list(grad_sort(v10))), num_nodes - 4)
+        self.assertEqual(v10.recompute().value.item(), value)
+        self.assertAlmostEqual(mu.grad, 1.25, places=8)
+        self.assertAlmostEqual(sigma.grad, 2.125, places=8)
+
+    def test_grad_from_output(self):
+        data = [0.3, -1.2, 2.5]
+        for op in [ag.exp, ag.sigmoid, ag.tanh, ag.relu]:
+            with self.subTest(op=op.__name__):
+                v = ag.Variable(ag.Vector(data))
+                t = op(v)
+                ag.grad(t.sum())
+                for i, x in enumerate(data):
+                    h = 1e-6
+                    f_plus = op(ag.Variable(x + h)).value.item()
+                    f_minus = op(ag.Variable(x - h)).value.item()
+                    self.assertAlmostEqual(v.grad[i].item(), (f_plus - f_minus) / (2 * h), 
+                                           places=5)
+
+    def test_vjp(self):
+        x = ag.Variable(ag.Vector([1.0, 2.0, 3.0]))
+        c = ag.Variable(2.0)
+        t = (x * c) / x
+        y = x * x + c * x - c
+        ag.grad(y.sum())
+        self.assertEqual(x.grad.tolist(), [4.0, 6.0, 8.0])
+        self.assertEqual(c.grad.item(), 3.0)
+
+        # gradients are computed only for the parents that need them
+        grads = t.parent_one.vjp(ag.Vector([1.0, 1.0, 1.0]), [False, True])
+        self.assertIsNone(grads[0])
+        self.assertEqual(grads[1].item(), 6.0)
+        # a parent occurring twice gets the sum of both of its gradients
+        self.assertEqual((x / x).partial_derivative(ag.Vector([1.0, 1.0, 1.0]), x).tolist(), 
+                         [0.0, 0.0, 0.0])
+
+    def test_index(self):
+        p = ag.Variable(ag.Vector([1, 2, 3, 4, 5, 6]))
+        w1, w2 = p[:3], p[3:]
+        loss = (w1 * w2).sum() + p[-1] * 2 + p[::2].sum()
+        self.assertEqual(loss.value.item(), 32 + 12 + 9)
+        ag.grad(loss)
+        self.assertEqual(p.grad.tolist(), [5, 5, 7, 1, 3, 5])
+        # the slices of the gradient stay sparse until they are summed
+        grads = w1.vjp(ag.Vector([1, 1, 1]))
+        self.assertIsInstance(grads[0], IndexedSlices)
+        self.assertEqual((grads[0] + w2.vjp(ag.Vector([2, 2, 2]))[0]).to_dense().tolist(), 
+                         [1, 1, 1, 2, 2, 2])
+
+        m = ag.Variable(ag.Matrix([[1, 2], [3, 4]]))
+        with self.assertRaises(TypeError):
+            m[0]
+        with ag.no_grad():
+            self.assertEqual(m[0].tolist(), [1, 2])
+
+    def test_accumulate(self):
+        a = ag.Variable(ag.Vector([1, 2]))
+        b = ag.Variable(ag.Vector([3, 4]))
+        x = ag.Vector([0.5, -1])
+        # the gradient of a sum is passed through to both parents,
+        # yet the leaves get their own buffers
+        ag.grad(((a + b) * x).sum())
+        self.assertIsNot(a.grad, b.grad)
+        for _ in range(2):
+            ag.grad(((a + b) * x + a * a).sum(), accumulate=True)
+        self.assertEqual(a.grad.tolist(), [0.5 + 2 * (0.5 + 2), -1 + 2 * (-1 + 4)])
+        self.assertEqual(b.grad.tolist(), [0.5 * 3, -1 * 3])
+
+    def test_jvp(self):
+        w = ag.Variable(ag.Matrix([[0.5, -1, 2], [1, 0.3, -0.2]]))
+
+        def fn(x, y):
+            return ag.tanh(w @ x) * y + x[:2] ** 2 / (1 + ag.exp(-y.sum()))
+
+        x, y = ag.Vector([0.3, -0.7, 1.2]), ag.Vector([2, -1])
+        dx, dy = ag.Vector([1, 0.5, -2]), ag.Vector([0.1, 3])
+        value, tangent = ag.jvp(fn, [x, y], [dx, dy])
+        # the directional derivative agrees with the gradients of reverse mode
+        vx, vy = ag.Variable(x), ag.Variable(y)
+        out = fn(vx, vy)
+        self.assertEqual(value.tolist(), out.value.tolist())
+        for i in range(2):
+            gx, gy = ag.grad(out, wrt=[vx, vy], top_grad=ag.Vector([i == 0, i == 1]))
+            self.assertAlmostEqual(tangent.tolist()[i], (gx @ dx + gy @ dy).item())
+        with self.assertRaises(ValueError):
+            ag.jvp(fn, [x, y], [dx, ag.Vector([1])])
+
+        # forward mode for wide outputs, reverse mode for wide inputs
+        wide = ag.Vector([0.1, 0.2, 0.3, 0.4])
+        short = ag.Vector([0.5, -1])
+        expand = lambda x: ag.sin(wide * x[0]) + x[1] * wide
+        reduce = lambda x: (w.T @ ag.exp(x[:2]) - x[1:]) * x[0]
+        for fn, x in [(expand, short), (reduce, wide)]:
+            jacobian = ag.jacobian(fn, x)
+            self.assertEqual(jacobian.shape, (fn(x).dim, x.dim))
+            for j in range(x.dim):
+                column = ag.jvp(fn, [x], [ag.Vector([j == k for k in range(x.dim)])])[1]
+                for i in range(jacobian.shape[0]):
+                    self.assertAlmostEqual(jacobian[i, j], column.tolist()[i])
+
+    def test_create_graph(self):
+        x = ag.Variable(ag.Vector([0.5, -1, 2]))
+        y = (x ** 3).sum()
+        g, = ag.grad(y, wrt=[x], create_graph=True)
+        self.assertIsInstance(g, ag.Node)
+        self.assertEqual(g.value.tolist(), [0.75, 3, 12])
+        # the gradient is differentiated again (twice)
+        g2, = ag.grad(g.sum(), wrt=[x], create_graph=True)
+        self.assertEqual(g2.value.tolist(), [3, -6, 12])
+        g3, = ag.grad(g2.sum(), wrt=[x])
+        self.assertEqual(g3.tolist(), [6, 6, 6])
+        with self.assertRaises(ValueError):
+            ag.grad(y, create_graph=True, retain_graph=False)
+
+        # through a checkpointed segment, which is rebuilt on its inputs
+        def segment(h, w):
+            return ag.tanh(h * w) * h
+
+        w = ag.Variable(ag.Vector([0.9, -1.1, 0.7]))
+        grads = []
+        for use_checkpoint in [False, True]:
+            h = x * x
+            y = (ag.checkpoint(segment, h, w) if use_checkpoint else segment(h, w)).sum()
+            gx, gw = ag.grad(y, wrt=[x, w], create_graph=True)
+            grads.append(ag.grad((gx * gw).sum(), wrt=[x, w]))
+        for expected, actual in zip(*grads):
+            for e, a in zip(expected.tolist(), actual.tolist()):
+                self.assertAlmostEqual(e, a, places=12)
+
+    def test_hvp(self):
+        w = ag.Variable(ag.Matrix([[0.5, -1, 2], [1, 0.3, -0.2]]))
+        b = ag.Vector([0.1, -0.2, 0.3])
+
+        def fn(x, m):
+            h = ag.tanh(x @ w + b)
+            return ((h * h).sum() + (x[1:] ** 3).sum() + (m.T @ x[:2]).sum() ** 2 
+                    + ag.sigmoid(x) @ ag.relu(x) + ag.abs(x).sum() * x[0])
+
+        x, m = ag.Vector([0.3, -0.7]), ag.Matrix([[1, 2], [0.5, -1]])
+        dx, dm = ag.Vector([1, -2]), ag.Matrix([[0.1, 0.2], [0.3, -0.4]])
+        value, (hx, hm) = ag.hvp(fn, [x, m], [dx, dm])
+        self.assertEqual(value.item(), fn(x, m).value.item())
+
+        def gradients(x, m):
+            x, m = ag.Variable(x), ag.Variable(m)
+            return ag.grad(fn(x, m), wrt=[x, m])
+
+        # central differences of the gradients along the tangents
+        h = 1e-5
+        plus, minus = gradients(x + h * dx, m + h * dm), gradients(x - h * dx, m - h * dm)
+        flatten = lambda v: sum(v.tolist(), []) if isinstance(v, ag.Matrix) else v.tolist()
+        for product, g_plus, g_minus in zip([hx, hm], plus, minus):
+            for p, e in zip(flatten(product), flatten((g_plus - g_minus) / (2 * h))):
+                self.assertAlmostEqual(p, e, places=5)
+
+    def test_fused_losses(self):
+        z = ag.Variable(ag.Vector([0.5, -2, 3]))
+        y = ag.Vector([1, 0, 1])
+        probs = ag.Vector([0.2, 0.3, 0.5])
+
+        def unfused():
+            s = ag.sigmoid(z)
+            bce = -(y * ag.log(s) + (1 - y) * ag.log(1 - s))
+            e = ag.exp(z)
+            lse = ag.log(e.sum())
+            return bce.sum() + lse + (probs * (lse - z)).sum() + z.sum() / 3
+
+        def fused():
+            return (ag.binary_cross_entropy_with_logits(z, y).sum() + ag.logsumexp(z)
+                    + ag.softmax_cross_entropy(z, probs) + ag.mean(z))
+
+        for fn in [unfused, fused]:
+            loss = fn()
+            ag.grad(loss)
+            if fn is unfused:
+                expected, expected_grad = loss.value.item(), z.grad.tolist()
+        self.assertAlmostEqual(loss.value.item(), expected, places=12)
+        for g, g_true in zip(z.grad.tolist(), expected_grad):
+            self.assertAlmostEqual(g, g_true, places=10)
+        self.assertLess(len(list(grad_sort(fused()))), len(list(grad_sort(unfused()))) // 2)
+
+        # saturated logits neither overflow nor lose the gradient
+        big = ag.Variable(ag.Vector([1000, -1000]))
+        loss = ag.binary_cross_entropy_with_logits(big, ag.Vector([0, 1])).sum()
+        ag.grad(loss)
+        self.assertEqual((loss.value.item(), big.grad.tolist()), (2000, [1, -1]))
+        loss = ag.softmax_cross_entropy(big, 1)
+        ag.grad(loss)
+        self.assertEqual((loss.value.item(), big.grad.tolist()), (2000, [1, -1]))
+
+        # the gradient of max is split between the tied elements
+        m = ag.Variable(ag.Matrix([[1, 5], [5, 2]]))
+        ag.grad(ag.max(m) + ag.mean(m))
+        self.assertEqual(m.grad.tolist(), [[0.25, 0.75], [0.75, 0.25]])
+
+        # an infinite maximum isn't subtracted
+        for data, expected in [([-math.inf, -math.inf], -math.inf), ([math.inf, 0], math.inf),
+                               ([-math.inf, 0], 0)]:
+            self.assertEqual(ag.logsumexp(ag.Vector(data)).value.item(), expected)
+
+        # forward mode and second order derivatives go through the fused ops
+        def fn(z):
+            return ag.softmax_cross_entropy(z, 2) + ag.binary_cross_entropy_with_logits(z, y).sum()
+
+        v = ag.Vector([1, -0.5, 0.25])
+        _, tangent = ag.jvp(fn, [z.value], [v])
+        g, = ag.grad(fn(z), wrt=[z])
+        self.assertAlmostEqual(tangent.item(), (g @ v).item(), places=12)
+        _, (product,) = ag.hvp(fn, [z.value], [v])
+
+        def gradient(value):
+            z.value = value
+            ag.grad(fn(z))
+            return z.grad
+
+        h, value = 1e-5, z.value
+        estimate = (gradient(value + h * v) - gradient(value - h * v)) / (2 * h)
+        for p, e in zip(product.tolist(), estimate.tolist()):
+            self.assertAlmostEqual(p, e, places=6)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import unittest
+import autograd as ag
+
+
+class TestMatrix(unittest.TestCase):
+
+    def test_transpose_view(self):
+        m = ag.Matrix([[1, 2, 3], [4, 5, 6]])
+        t = m.T
+        self.assertIs(t.data, m.data)
+        self.assertEqual(t.shape, (3, 2))
+        self.assertEqual(t.tolist(), [[1, 4], [2, 5], [3, 6]])
+        self.assertEqual(t[0].tolist(), [1, 4])
+        self.assertEqual(m[1:].tolist(), [[4, 5, 6]])
+        self.assertEqual((t + 1).tolist(), [[2, 5], [3, 6], [4, 7]])
+
+    def test_broadcast(self):
+        m = ag.Matrix([[1, 2], [3, 4]])
+        self.assertEqual((m + ag.Vector([10, 20])).tolist(), [[11, 22], [13, 24]])
+        self.assertEqual((ag.Vector([10, 20]) - m).tolist(), [[9, 18], [7, 16]])
+        self.assertEqual((m * ag.Matrix([[1], [2]])).tolist(), [[1, 2], [6, 8]])
+        self.assertEqual((2 ** m).tolist(), [[2, 4], [8, 16]])
+        self.assertEqual(m.sum(axis=0).tolist(), [4, 6])
+        self.assertEqual(m.sum(axis=1).tolist(), [3, 7])
+        with self.assertRaises(ValueError):
+            m + ag.Vector([1, 2, 3])
+
+    def test_matmul(self):
+        a = ag.Matrix([[1, 2, 3], [4, 5, 6]])
+        b = ag.Matrix([[1, 0], [0, 1], [2, -1]])
+        v = ag.Vector([1, -1, 2])
+        for name in ag.available_backends():
+            with self.subTest(backend=name):
+                ag.set_backend(name)
+                try:
+                    self.assertEqual((a @ b).tolist(), [[7, -1], [16, -1]])
+                    self.assertEqual((a @ a.T).tolist(), [[14, 32], [32, 77]])
+                    self.assertEqual((a @ v).tolist(), [5, 11])
+                    self.assertEqual((ag.Vector([1, 1]) @ a).tolist(), [5, 7, 9])
+                finally:
+                    ag.set_backend('list')
+
+    def test_grad(self):
+        x = ag.Matrix([[1, 2, 3], [0.5, -1, 2]])
+        w = ag.Variable(ag.Matrix([[0.1, -0.2], [0.3, 0.4], [-0.5, 0.6]]))
+        b = ag.Variable(ag.Vector([0.1, -0.1]))
+        v = ag.Variable(ag.Vector([1, -2]))
+
+        def loss_fn():
+            return (ag.tanh(x @ w + b) @ v).sum() + (v @ w.T).sum()
+
+        ag.grad(loss_fn())
+        h = 1e-6
+        for var in [w, b, v]:
+            value = var.value
+            flat = value.tolist()
+            flat = [e for row in flat for e in row] if isinstance(value, ag.Matrix) else flat
+            grad = var.grad.tolist()
+            grad = [e for row in grad for e in row] if isinstance(value, ag.Matrix) else grad
+
+            for i in range(len(flat)):
+                estimates = []
+                for step in [h, -h]:
+                    data = list(flat)
+                    data[i] += step
+                    var.value = (ag.Matrix([data[j:j + 2] for j in range(0, len(data), 2)])
+                                 if isinstance(value, ag.Matrix) else ag.Vector(data))
+                    estimates.append(loss_fn().value.item())
+                var.value = value
+                self.assertAlmostEqual(grad[i], (estimates[0] - estimates[1]) / (2 * h),
+                                       places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
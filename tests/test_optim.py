@@ -0,0 +1,67 @@
+import math
+import unittest
+import autograd as ag
+
+
+class TestOptim(unittest.TestCase):
+
+    def setUp(self):
+        self.w = ag.Variable(ag.Vector([-0.5, 0.3, 1]))
+        self.b = ag.Variable(2)
+        self.data = [(ag.Vector([10, 0.4, 3.5]), 1), (ag.Vector([-2, 1, 0.5]), 0),
+                     (ag.Vector([1, -3, 2]), 1), (ag.Vector([0.5, 2, -1]), 0)]
+
+    def loss_fn(self, x, y):
+        model = ag.sigmoid(self.w @ x + self.b)
+        return -(y * ag.log(model) + (1 - y) * ag.log(1 - model))
+
+    def train(self, optimizer, epochs=20):
+        values = [self.w.value, self.b.value]
+        losses = []
+        for _ in range(epochs):
+            optimizer.zero_grad()
+            total = 0
+            for x, y in self.data:
+                loss = self.loss_fn(x, y)
+                ag.grad(loss, accumulate=True)
+                total += loss.value.item()
+            optimizer.step()
+            losses.append(total)
+        # the parameters are updated in place
+        self.assertIs(self.w.value, values[0])
+        self.assertIs(self.b.value, values[1])
+        return losses
+
+    def test_sgd(self):
+        losses = self.train(ag.optim.SGD([self.w, self.b], lr=0.1))
+        self.assertLess(losses[-1], losses[0])
+
+    def test_momentum(self):
+        losses = self.train(ag.optim.Momentum([self.w, self.b], lr=0.01))
+        self.assertLess(losses[-1], losses[0])
+
+    def test_adam(self):
+        w0 = self.w.value.tolist()
+        optimizer = ag.optim.Adam([self.w, self.b], lr=0.01)
+        ag.grad(self.loss_fn(*self.data[0]))
+        grad = self.w.grad.tolist()
+        optimizer.step()
+        # the first step of Adam moves every parameter by about lr against its gradient
+        for v, v0, g in zip(self.w.value.tolist(), w0, grad):
+            self.assertAlmostEqual(v, v0 - 0.01 * g / (abs(g) + 1e-8), places=9)
+
+        losses = self.train(optimizer)
+        self.assertLess(losses[-1], losses[0])
+        self.assertTrue(all(math.isfinite(v) for v in self.w.value.tolist()))
+
+    def test_zero_grad(self):
+        optimizer = ag.optim.SGD([self.w, self.b])
+        ag.grad(self.loss_fn(*self.data[0]))
+        grad = self.w.grad
+        optimizer.zero_grad()
+        self.assertIs(self.w.grad, grad)
+        self.assertEqual(grad.tolist(), [0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
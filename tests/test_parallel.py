@@ -0,0 +1,94 @@
+import pickle
+import unittest
+import autograd as ag
+from autograd.parallel import GradMap, grad_map
+
+
+def loss_fn(params, shard):
+    # binary cross entropy of a logistic regression model summed over the shard
+    w, b = params
+    loss = 0
+    for x, y in shard:
+        model = ag.sigmoid(w @ x + b)
+        loss = loss - (y * ag.log(model) + (1 - y) * ag.log(1 - model))
+    return loss
+
+
+def sum_loss_fn(params, shard):
+    # the addition passes the same gradient to both parameters
+    w, b = params
+    return ((w + b) * shard).sum()
+
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.w = ag.Variable(ag.Vector([-0.5, 0.3, 1]))
+        self.b = ag.Variable(2)
+        self.data = [(ag.Vector([10, 0.4, 3.5]), 1), (ag.Vector([-2, 1, 0.5]), 0),
+                     (ag.Vector([1, -3, 2]), 1), (ag.Vector([0.5, 2, -1]), 0),
+                     (ag.Vector([0.3, 0.2, -0.1]), 1)]
+
+    def test_pickle(self):
+        for value in [ag.Vector([1.5, -2, 3, 4])[1:], ag.Matrix([[1, 2, 3], [4, 5, 6]]).T]:
+            copy = pickle.loads(pickle.dumps(value))
+            self.assertEqual(copy.tolist(), value.tolist())
+            copy += 1
+            self.assertNotEqual(copy.tolist(), value.tolist())
+        # the elements are pickled as raw doubles
+        self.assertLess(len(pickle.dumps(ag.Vector([0.1] * 1000))), 8 * 1000 + 200)
+
+        # other elements are pickled as numbers
+        for name in ag.available_backends():
+            with self.subTest(backend=name):
+                ag.set_backend(name)
+                try:
+                    for value in [ag.Vector([1 + 2j, 3]), ag.Matrix([[1j, 2], [3, 4]])]:
+                        self.assertEqual(pickle.loads(pickle.dumps(value)).tolist(),
+                                         value.tolist())
+                    copy = pickle.loads(pickle.dumps(ag.Vector([10, 3])))
+                    self.assertEqual(copy.tolist(), [10, 3])
+                    if name == 'list':
+                        self.assertIsInstance(copy.tolist()[0], int)
+                finally:
+                    ag.set_backend('list')
+
+    def test_grad_map(self):
+        loss = loss_fn([self.w, self.b], self.data)
+        ag.grad(loss)
+        grads = [self.w.grad.tolist(), self.b.grad.tolist()]
+
+        shards = [self.data[:2], self.data[2:4], self.data[4:]]
+        total = grad_map(loss_fn, [self.w, self.b], shards, workers=2)
+        self.assertAlmostEqual(total.item(), loss.value.item(), places=12)
+        for param, expected in zip([self.w, self.b], grads):
+            for g, g_true in zip(param.grad.tolist(), expected):
+                self.assertAlmostEqual(g, g_true, places=12)
+
+    def test_shared_grad(self):
+        w, b = ag.Variable(ag.Vector([1, 2])), ag.Variable(ag.Vector([3, 4]))
+        shards = [ag.Vector([1, 2]), ag.Vector([2, 3]), ag.Vector([4, 4])]
+        ag.grad(sum_loss_fn([w, b], sum(shards[1:], shards[0])))
+        grads = [w.grad.tolist(), b.grad.tolist()]
+        self.assertEqual(grads, [[7, 9], [7, 9]])
+
+        w_grad, b_grad = ag.grad(sum_loss_fn([w, b], shards[0]), wrt=[w, b])
+        self.assertIsNot(w_grad, b_grad)
+        grad_map(sum_loss_fn, [w, b], shards, workers=2)
+        self.assertEqual([w.grad.tolist(), b.grad.tolist()], grads)
+
+    def test_broadcast(self):
+        # the workers see the values of the parameters at the time of the call
+        with GradMap(loss_fn, [self.w, self.b], workers=2) as fn:
+            for _ in range(3):
+                fn([self.data[:3], self.data[3:]])
+                self.w.value.axpy(-0.1, self.w.grad)
+                self.b.value.axpy(-0.1, self.b.grad)
+                total = fn([self.data[:3], self.data[3:]])
+                self.assertAlmostEqual(total.item(),
+                                       loss_fn([self.w, self.b], self.data).value.item(),
+                                       places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,13 @@
-import autograd as ag
+import builtins
+import math
+import os
+import pickle
+import struct
+import tempfile
 import unittest
+from fractions import Fraction
+from multiprocessing import shared_memory
+import autograd as ag
 
 
 class TestVector(unittest.TestCase):
@@ -45,6 +53,12 @@ class TestVector(unittest.TestCase):
         self.assertEqual(v3[1], base ** v[1])
         self.assertEqual(v3[2], base ** v[2])
 
+        # integers and fractions are kept exact (not converted to doubles)
+        self.assertEqual((ag.Vector([10]) ** 400).item(), 10 ** 400)
+        self.assertEqual((ag.Vector([2 ** 1100]) - 1).item(), 2 ** 1100 - 1)
+        self.assertEqual((ag.Vector([Fraction(1, 3)]) * 3).item(), 1)
+        self.assertIsInstance((ag.Vector([Fraction(1, 3)]) + 1).item(), Fraction)
+
     def test_div(self):
         v = ag.Vector([2, 18, 3])
 
@@ -77,6 +91,147 @@ class TestVector(unittest.TestCase):
         self.assertTrue((v1 == v1).all())
         self.assertTrue((v1 != v2).any())
 
+    def test_init_validation(self):
+        with self.assertRaises(TypeError):
+            ag.Vector(3)
+        with self.assertRaises(ValueError):
+            ag.Vector([1, 'a'])
+        # results of operations are built without re-validating the elements
+        self.assertEqual((ag.Vector([1, 2]) * 2).tolist(), [2, 4])
+
+    def test_broadcast(self):
+        v = ag.Vector([2, 4])
+        self.assertEqual((ag.Vector([1]) / v).tolist(), [0.5, 0.25])
+        self.assertEqual((v - ag.Vector([1])).tolist(), [1, 3])
+        self.assertEqual((2 ** v).tolist(), [4, 16])
+
+    def test_backends(self):
+        data = [0.5, -1.5, 2]
+        expected = {
+            'exp': [math.exp(v) for v in data],
+            'mul': [v * v for v in data],
+            'rsub': [1 - v for v in data],
+            'matmul': [builtins.sum(v * v for v in data)],
+        }
+        for name in ag.available_backends():
+            with self.subTest(backend=name):
+                ag.set_backend(name)
+                try:
+                    v = ag.Vector(data)
+                    self.assertEqual(ag.get_backend(), name)
+                    self.assertEqual(v.exp().tolist(), expected['exp'])
+                    self.assertEqual((v * v).tolist(), expected['mul'])
+                    self.assertEqual((1 - v).tolist(), expected['rsub'])
+                    self.assertEqual((v @ v).tolist(), expected['matmul'])
+                    self.assertTrue((v > 0).any())
+                    self.assertFalse((v > 0).all())
+                finally:
+                    ag.set_backend('list')
+
+    def test_views(self):
+        data = [1.5, -2, 3, 4]
+        for name in ag.available_backends():
+            with self.subTest(backend=name):
+                ag.set_backend(name)
+                try:
+                    buffer = bytearray(struct.pack('4d', *data))
+                    v = ag.Vector.frombuffer(buffer)
+                    self.assertEqual(v.tolist(), data)
+                    self.assertEqual(ag.Vector.frombuffer(buffer, offset=8, count=2).tolist(), 
+                                     data[1:3])
+                    self.assertEqual(v.memoryview().tolist(), data)
+                    w = v[1::2]
+                    w[0] = 10
+                    if name != 'list':
+                        # views and vectors over buffers share the memory
+                        self.assertEqual(v.tolist(), [1.5, 10, 3, 4])
+                        self.assertEqual(struct.unpack('4d', buffer), (1.5, 10, 3, 4))
+                    self.assertEqual(w.copy().tolist(), [10, 4])
+
+                    # deleting elements of a vector that has views
+                    u = ag.Vector(data)
+                    w = u[:2]
+                    del u[0]
+                    self.assertEqual(u.tolist(), data[1:])
+                    self.assertEqual(w.tolist(), data[:2])
+                finally:
+                    ag.set_backend('list')
+
+    def test_mmap(self):
+        # vectors share the memory of files and blocks with the 'array' and 'numpy' backends
+        ag.set_backend('array')
+        try:
+            data = [1.5, -2, 3, 4]
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'data.bin')
+                ag.Vector(data).tofile(path)
+                self.assertEqual(ag.Vector.from_file(path, offset=8, count=2).tolist(), data[1:3])
+
+                v = ag.Vector.mmap(path, mode='r+', offset=8)
+                self.assertEqual(v.tolist(), data[1:])
+                v += 1
+                self.assertEqual(ag.Vector.from_file(path).tolist(), [1.5, -1, 4, 5])
+                # pickled by the path of the file, not by its elements
+                self.assertIn(path.encode(), pickle.dumps(v))
+                self.assertEqual(pickle.loads(pickle.dumps(v)).tolist(), [-1, 4, 5])
+
+                c = ag.Vector.mmap(path, mode='c')
+                c *= 0
+                self.assertEqual(ag.Vector.from_file(path).tolist(), [1.5, -1, 4, 5])
+                self.assertEqual(pickle.loads(pickle.dumps(c)).tolist(), [0, 0, 0, 0])
+                with self.assertRaises(TypeError):
+                    ag.Vector.mmap(path)[0] = 1
+                del v, c
+        finally:
+            ag.set_backend('list')
+
+    def test_shared(self):
+        block = shared_memory.SharedMemory(create=True, size=8 * 4)
+        ag.set_backend('array')
+        try:
+            v = ag.Vector.shared(block)
+            v[:] = [1, 2, 3, 4]
+            # the unpickled vectors (also of slices) read the same memory
+            w = pickle.loads(pickle.dumps(v[2:]))
+            self.assertEqual(w.tolist(), [3, 4])
+            w *= 2
+            self.assertEqual(v.tolist(), [1, 2, 6, 8])
+            u = pickle.loads(pickle.dumps(ag.Vector.shared(block.name, offset=8, count=2)))
+            u += 10
+            self.assertEqual(v.tolist(), [1, 12, 16, 8])
+            # strided slices are copied
+            s = pickle.loads(pickle.dumps(v[::2]))
+            s += 1
+            self.assertEqual(v.tolist(), [1, 12, 16, 8])
+            del v, w, u, s
+            # the blocks attached by name are closed once their vectors are gone
+            ag.Vector.release_shared(block.name)
+            block.close()
+        finally:
+            ag.set_backend('list')
+            block.unlink()
+
+    def test_inplace(self):
+        for name in ag.available_backends():
+            with self.subTest(backend=name):
+                ag.set_backend(name)
+                try:
+                    v = ag.Vector([1.0, 2.0, 3.0])
+                    view = v[1:]
+                    data = v.data
+                    v += 1
+                    v *= ag.Vector([2])
+                    v -= ag.Vector([1, 1, 1])
+                    v.axpy(0.5, ag.Vector([2, 4, 6]))
+                    self.assertEqual(v.tolist(), [4, 7, 10])
+                    self.assertIs(v.data, data)
+                    if name != 'list':
+                        self.assertEqual(view.tolist(), [7, 10])
+                    with self.assertRaises(ValueError):
+                        v += ag.Vector([1, 2])
+                finally:
+                    ag.set_backend('list')
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file